@@ -0,0 +1,167 @@
+"""
+benchmark of loading solutions of project (tags and notes of every solution)
+
+creates synthetic project with N solutions (default 1000) in temp dir and measures:
+* eager serial loading with pure python yaml parser (how project was loaded before)
+* eager serial loading with libyaml parser (CSafeLoader, if available)
+* preload of all solutions (Project.preload_solutions) in this process and in worker processes
+* opening of project with lazy solutions (only dirs are listed)
+* preload with warm project index (unchanged files are not parsed)
+
+usage: python benchmarks/project_load.py [-n 1000] [--tests 30] [--jobs N] [--repeat 3]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import spef.utils.index as index
+import spef.utils.loading as loading
+import spef.utils.logger as logger
+import spef.utils.serialization as serialization
+from spef.modules.project import Project
+
+
+def create_project(path, solutions, tests):
+    for i in range(solutions):
+        solution_dir = os.path.join(path, f"x{i:05d}{i % 100:02d}")
+        os.makedirs(os.path.join(solution_dir, logger.TESTS_DIR))
+        os.makedirs(os.path.join(solution_dir, logger.REPORT_DIR))
+        solution_tags = {
+            "score": [i % 10],
+            "last_testing": ["10/03/22-15:30"],
+            "testsuite_version": [3],
+            "group": [],
+        }
+        tests_tags = {}
+        for t in range(tests):
+            tests_tags[f"test{t}_{'ok' if (i + t) % 3 else 'fail'}"] = []
+            tests_tags[f"scoring_test{t}"] = [(i + t) % 2]
+            tests_tags[f"test{t}_time"] = [round(0.01 * t, 2)]
+        test_notes = {3: [f"note {n} for solution {i}" for n in range(3)]}
+        with open(os.path.join(solution_dir, logger.SOLUTION_TAGS), "w") as f:
+            yaml.dump(solution_tags, f, default_flow_style=False)
+        with open(
+            os.path.join(solution_dir, logger.TESTS_DIR, logger.TESTS_TAGS), "w"
+        ) as f:
+            yaml.dump(tests_tags, f, default_flow_style=False)
+        with open(
+            os.path.join(solution_dir, logger.REPORT_DIR, logger.TEST_NOTES_FILE), "w"
+        ) as f:
+            yaml.dump(test_notes, f, default_flow_style=False)
+        with open(
+            os.path.join(solution_dir, logger.REPORT_DIR, logger.USER_NOTES_FILE), "w"
+        ) as f:
+            f.write("good job\ncheck error handling")
+    # files older than racy window of index (so they can be saved to index)
+    old = time.time() - 60
+    for root, _, files in os.walk(path):
+        for file_name in files:
+            os.utime(os.path.join(root, file_name), (old, old))
+
+
+def open_project(path):
+    proj = Project(path)
+    proj.solution_id = "x[a-z0-9]{5}[0-9]{2}"
+    proj.solutions = proj.load_solutions()
+    return proj
+
+
+def load_eager(proj):
+    for solution in proj.solutions.values():
+        loading.load_solution_tags(solution.path)
+        loading.load_tests_tags(os.path.join(solution.path, logger.TESTS_DIR))
+        loading.load_user_notes_for_solution(solution.path)
+        loading.load_test_notes_for_solution(solution.path)
+
+
+def measure(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", type=int, default=1000, help="number of solutions")
+    parser.add_argument("--tests", type=int, default=30, help="number of tests")
+    parser.add_argument(
+        "--jobs", type=int, default=None, help="worker processes (default cpu count)"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="spef-bench-")
+    proj_path = os.path.join(tmp_dir, "proj")
+    try:
+        create_project(proj_path, args.n, args.tests)
+        proj = open_project(proj_path)
+        print(f"project: {len(proj.solutions)} solutions, {args.tests} tests")
+        jobs = args.jobs or os.cpu_count() or 1
+        print(f"libyaml: {yaml.__with_libyaml__}, jobs: {jobs}\n")
+
+        def no_index():
+            index.project_indexes.clear()
+            index_file = index.get_index_file(proj_path)
+            if os.path.exists(index_file):
+                os.remove(index_file)
+
+        def preload(jobs):
+            no_index()
+            open_project(proj_path).preload_solutions(jobs)
+
+        def warm_preload():
+            index.project_indexes.clear()
+            open_project(proj_path).preload_solutions()
+
+        results = []
+        loader = serialization.YamlLoader
+        serialization.YamlLoader = yaml.SafeLoader
+        results.append(
+            (
+                "eager, serial, pure python yaml",
+                measure(lambda: load_eager(proj), args.repeat),
+            )
+        )
+        serialization.YamlLoader = loader
+        results.append(
+            ("eager, serial, libyaml", measure(lambda: load_eager(proj), args.repeat))
+        )
+        results.append(
+            ("preload, in process", measure(lambda: preload(1), args.repeat))
+        )
+        if jobs > 1:
+            results.append(
+                (
+                    f"preload, {jobs} processes",
+                    measure(lambda: preload(jobs), args.repeat),
+                )
+            )
+        results.append(
+            (
+                "open project (lazy solutions)",
+                measure(lambda: open_project(proj_path), args.repeat),
+            )
+        )
+        index.save_project_indexes()
+        results.append(("preload, warm index", measure(warm_preload, args.repeat)))
+
+        base = results[0][1]
+        for name, seconds in results:
+            print(f"{name:<36} {seconds * 1000:9.1f} ms  {base / seconds:6.1f}x")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+micro-benchmark of yaml serialization (spef/utils/serialization.py)
+
+measures throughput of loading and saving of tags and reports files
+with pure python loader/dumper (before) and libyaml ones (after)
+
+usage: python benchmarks/serialization.py [--tags 100] [--notes 50] [--number 300]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import spef.utils.serialization as serialization
+from spef.modules.report import Note, Report
+from spef.modules.tags import Tags
+from spef.utils.loading import (
+    load_tags,
+    save_tags_to_file,
+    load_report_from_file,
+    save_report_to_file,
+)
+
+
+def create_tags(path, count):
+    data = {}
+    for i in range(count):
+        data[f"test{i}_{'ok' if i % 3 else 'fail'}"] = []
+        data[f"scoring_test{i}"] = [i % 2]
+    data["last_testing"] = ["10/03/22-15:30"]
+    return Tags(path, data)
+
+
+def create_report(path, count):
+    notes = [Note(f"note {i}: check line {i}", row=i, col=i % 7) for i in range(count)]
+    return Report(path, notes)
+
+
+# returns operations per second
+def measure(func, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return number / (time.perf_counter() - start)
+
+
+def run(tmp_dir, args):
+    tags = create_tags(os.path.join(tmp_dir, "solution_tags.yaml"), args.tags)
+    report = create_report(os.path.join(tmp_dir, "sut_report.yaml"), args.notes)
+    save_tags_to_file(tags)
+    save_report_to_file(report)
+    return {
+        "tags load": measure(lambda: load_tags(tags.path), args.number),
+        "tags save": measure(lambda: save_tags_to_file(tags), args.number),
+        "report load": measure(
+            lambda: load_report_from_file(report.path, add_suffix=False), args.number
+        ),
+        "report save": measure(lambda: save_report_to_file(report), args.number),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tags", type=int, default=100, help="tests in tags file")
+    parser.add_argument("--notes", type=int, default=50, help="notes in report")
+    parser.add_argument("--number", type=int, default=300, help="repetitions")
+    args = parser.parse_args()
+
+    print(f"libyaml: {yaml.__with_libyaml__}\n")
+    tmp_dir = tempfile.mkdtemp(prefix="spef-bench-")
+    try:
+        loader, dumper = serialization.YamlLoader, serialization.YamlDumper
+        serialization.YamlLoader = yaml.SafeLoader
+        serialization.YamlDumper = yaml.Dumper  # yaml.dump default (before)
+        before = run(tmp_dir, args)
+        serialization.YamlLoader, serialization.YamlDumper = loader, dumper
+        after = run(tmp_dir, args)
+
+        print(f"{'':<12} {'before':>12} {'after':>12}")
+        for name in before:
+            print(
+                f"{name:<12} {before[name]:>8.0f} op/s {after[name]:>8.0f} op/s"
+                f" {after[name] / before[name]:5.1f}x"
+            )
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
 from spef.main import run
 
-run()
+
+if __name__ == "__main__":
+    run()
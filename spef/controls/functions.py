@@ -106,6 +106,7 @@ EXPAND_ALL_SOLUTIONS = 715
 RENAME_ALL_SOLUTIONS = 716
 TEST_ALL_STUDENTS = 717
 TEST_CLEAN_ALL = 718
+TEST_ALL_STUDENTS_FORCE = 719
 
 
 # in solution dir
@@ -113,6 +114,8 @@ TEST_STUDENT = 720
 TEST_CLEAN = 721
 ALL_RUN_TESTS = 722
 RUN_TESTS = 723
+ALL_RUN_MODIFIED_TESTS = 732
+TESTING_CANCEL = 733
 GEN_CODE_REVIEW = 724
 GEN_TOTAL_REPORT = 725
 ADD_TEST_NOTE = 726
@@ -130,6 +133,7 @@ SHOW_TEST_RESULTS = 744
 
 SHOW_SCORING_STATS = 745
 SHOW_TST_RES_STATS = 746
+SHOW_TESTING_METRICS = 747
 
 # in tests dir
 ADD_TEST = 750
@@ -416,6 +420,15 @@ def get_menu_functions(in_proj_dir=False, in_solution_dir=False, is_test_dir=Fal
         "show test results stats": SHOW_TST_RES_STATS,
     }
 
+    testing = {
+        "all students - run tests (testsuite) even for unchanged solutions": TEST_ALL_STUDENTS_FORCE,
+        "all students - run only modified tests": ALL_RUN_MODIFIED_TESTS,
+        "all students - cancel testing running in background": TESTING_CANCEL,
+    }
+
+    # after all other options, so shortcuts of existing options stay the same
+    metrics = {"show testing time metrics": SHOW_TESTING_METRICS}
+
     result_dir = {}
     if in_solution_dir:  # in solution dir or in proj dir with selected solution
         result_dir.update(proj)
@@ -423,17 +436,23 @@ def get_menu_functions(in_proj_dir=False, in_solution_dir=False, is_test_dir=Fal
         result_dir.update(stats)
         result_dir.update(tests)
         result_dir.update(basic)
+        result_dir.update(testing)
+        result_dir.update(metrics)
     elif is_test_dir:  # in test dir or in tests dir with selected test
         result_dir.update(proj)
         result_dir.update(tests)
         result_dir.update(test)
         result_dir.update(stats)
         result_dir.update(basic)
+        result_dir.update(testing)
+        result_dir.update(metrics)
     elif in_proj_dir:  # in proj dir
         result_dir.update(proj)
         result_dir.update(tests)
         result_dir.update(stats)
         result_dir.update(basic)
+        result_dir.update(testing)
+        result_dir.update(metrics)
     else:
         result_dir.update(basic)
 
@@ -6,6 +6,8 @@ export RESULTS_DIR=$4
 export login=$5
 export FUT=$6
 export TEST_FILE=dotest.sh
+# tests dir is mounted read-only, so locks of tests cant be there
+export SANDBOXLOCK=${SANDBOXLOCK:-/tmp/tst_locks}
 shift 6
 for test_name in "$@"
 do
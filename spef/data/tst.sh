@@ -791,6 +791,7 @@ tst_run()
     # priprava
     lock_test `pwd`.$test
     prepare_test
+    test_start=`date +%s.%N`
     echo "Spoustim test $test ... (`id -un`)" >&2
     oldPWD=$PWD
     cd $T
@@ -815,6 +816,8 @@ tst_run()
         chmod -R g+rwX $T 2>/dev/null
     fi
     cd $oldPWD
+    # cas behu testu pre metriky testovania (spef)
+    echo "$test $test_start `date +%s.%N`" >>${TAGS%/*}/.test_times
     unlock_test
     unset success
     unset failure
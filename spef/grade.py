@@ -0,0 +1,157 @@
+import argparse
+import os
+import sys
+import threading
+import traceback
+
+import spef.utils.logger as logger
+from spef.modules.directory import Directory
+from spef.testing.container import close_container_pool
+from spef.testing.parallel import run_testsuite_parallel
+from spef.testing.report import generate_report_from_template
+from spef.testing.tst import calculate_score
+from spef.utils.loading import load_config_from_file
+from spef.utils.match import get_tests_names
+
+
+"""
+headless environment for grading from command line (no curses, no bash process)
+* cwd is fixed to the project root
+* exit mode means that testing was interrupted (ctrl+c) or failed
+"""
+
+
+class GradeEnvironment:
+    def __init__(self, cwd, conf, jobs=None, driver=None):
+        self.cwd = cwd
+        self.testing_driver = conf["testing"]["driver"] if driver is None else driver
+        self.testing_jobs = conf["testing"]["jobs"] if jobs is None else jobs
+        self.container_pool = conf["testing"]["container_pool"]
+        self.testing_parallel_tests = conf["testing"]["parallel_tests"]
+        self.testing_limits = conf["testing"]["limits"]
+        self.testing_output_tail = conf["testing"]["output_tail"]
+        self.testing_output_spill = conf["testing"]["output_spill"]
+        self.exit_event = threading.Event()
+
+    def set_exit_mode(self):
+        self.exit_event.set()
+
+    def is_exit_mode(self):
+        return self.exit_event.is_set()
+
+
+# add_to_user_logs for command line (printed to stderr, stdout is for results)
+def print_user_logs(env, m_type, message):
+    print(f"[{m_type}] {message}", file=sys.stderr, flush=True)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="spef grade",
+        description="run testsuite for all solutions of project, calculate their score and generate reports",
+    )
+    parser.add_argument("proj_dir", help="project root directory (with proj_conf.yaml)")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of solutions tested in parallel (0 = number of cpu cores, default from config)",
+    )
+    parser.add_argument(
+        "--tests",
+        default=None,
+        help="comma separated list of tests to run (results are merged to previous ones)",
+    )
+    parser.add_argument(
+        "--driver",
+        choices=["docker", "local", "fake"],
+        default=None,
+        help="driver for testing containers (default from config, local and fake run tests without docker)",
+    )
+    return parser.parse_args(argv)
+
+
+"""
+grade all solutions of project
+* returns exit code (0 = all solutions tested, 1 = some testing failed, 2 = bad arguments)
+* score of each solution is printed to stdout: `name score bonus`
+"""
+
+
+def grade(argv):
+    args = parse_args(argv)
+
+    if not os.path.exists(logger.TMP_DIR):
+        os.mkdir(logger.TMP_DIR)
+
+    conf = load_config_from_file()
+    if conf is None:
+        print_user_logs(None, "error", "cannot load config file")
+        return 2
+
+    proj_dir = os.path.abspath(args.proj_dir)
+    cwd = Directory(proj_dir)
+    cwd.get_proj_conf()
+    if cwd.proj is None or cwd.proj.path != proj_dir:
+        print_user_logs(
+            None, "error", f"'{args.proj_dir}' is not project root directory"
+        )
+        return 2
+    env = GradeEnvironment(cwd, conf, args.jobs, args.driver)
+
+    kwargs = {"jobs": env.testing_jobs}
+    if args.tests is not None:
+        tests = [test.strip() for test in args.tests.split(",") if test.strip()]
+        unknown = sorted(set(tests) - set(get_tests_names(env)))
+        if not tests or unknown:
+            print_user_logs(None, "error", f"unknown tests: {unknown}")
+            return 2
+        kwargs.update(
+            {
+                "with_logs": False,
+                "run_seq_tests": True,
+                "tests": tests,
+                "merge_results": True,
+            }
+        )
+
+    solutions = sorted(cwd.proj.get_solutions_list(), key=lambda s: s.name)
+    if not solutions:
+        print_user_logs(env, "warning", "no solutions found in project")
+        return 0
+
+    try:
+        # ctrl+c is handled in run_testsuite_parallel (results of finished solutions)
+        results = run_testsuite_parallel(env, solutions, print_user_logs, **kwargs)
+    finally:
+        close_container_pool()
+
+    report_template = os.path.join(
+        cwd.proj.path, logger.REPORT_DIR, logger.REPORT_TEMPLATE
+    )
+    all_tests = get_tests_names(env)
+    for solution in solutions:
+        if not results.get(solution.name):
+            print(f"{solution.name} - -", flush=True)
+            continue
+        score, bonus = calculate_score(env, solution, all_tests) or ("-", "-")
+        print(f"{solution.name} {score} {bonus}", flush=True)
+        if os.path.exists(report_template):
+            try:
+                generate_report_from_template(env, solution)
+            except Exception as err:
+                logger.log(
+                    "grade | generate report | "
+                    + str(err)
+                    + " | "
+                    + traceback.format_exc()
+                )
+                print_user_logs(
+                    env, "error", f"cannot generate report for '{solution.name}'"
+                )
+
+    failed = [s.name for s in solutions if not results.get(s.name)]
+    if failed:
+        print_user_logs(env, "warning", f"testing failed for: {failed}")
+        return 1
+    return 0
@@ -21,6 +21,9 @@ from spef.utils.loading import (
 from spef.utils.screens import create_screens_and_windows
 from spef.utils.coloring import init_color_pairs, COL_BKGD
 from spef.utils.printing import refresh_main_screens, print_hint
+from spef.utils.index import save_project_indexes
+from spef.utils.tag_store import close_tag_stores, tags_command
+from spef.utils.content_index import close_content_indexes
 from spef.utils.logger import log, TMP_DIR, LOG_FILE, DATA_DIR, USER_LOGS_FILE
 
 from spef.views.browsing import get_directory_content, directory_browsing
@@ -28,6 +31,9 @@ from spef.views.viewing import file_viewing
 from spef.views.tags import tag_management
 from spef.views.notes import notes_management
 from spef.views.user_logs import logs_viewing, go_down_in_user_logs
+from spef.testing.container import close_container_pool
+from spef.testing.jobs import stop_testing_job
+from spef.grade import grade
 
 
 global bash_proc
@@ -128,6 +134,11 @@ def main(stdscr, env=None):
         else:
             print_hint(env)
             if env.is_exit_mode():
+                stop_testing_job(env)
+                close_container_pool()
+                save_project_indexes()
+                close_tag_stores()
+                close_content_indexes()
                 try:
                     if os.path.exists(TMP_DIR):
                         shutil.rmtree(TMP_DIR)
@@ -311,6 +322,13 @@ def run_in_bash(stdscr, env):
 
 def run():
     global bash_proc
+    # headless grading from command line (spef grade <proj_dir>)
+    if len(sys.argv) > 1 and sys.argv[1] == "grade":
+        sys.exit(grade(sys.argv[2:]))
+    # copy tags between yaml files and project tag store (spef tags import|export <proj_dir>)
+    if len(sys.argv) > 1 and sys.argv[1] == "tags":
+        sys.exit(tags_command(sys.argv[2:]))
+
     # clear log file
     with open(LOG_FILE, "w+"):
         pass
@@ -87,28 +87,36 @@ class Directory:
         except Exception as err:
             log("get proj conf | " + str(err) + " | " + str(traceback.format_exc()))
 
+    # infos of dirs are computed lazily (only for displayed dirs, see get_dir_info)
     def get_dirs_info(self, env):
-        result = {}
-        for dir_name in self.dirs:
-            infos = None
-            dir_path = os.path.join(self.path, dir_name)
-            if self.proj is not None:
-                if dir_name in self.proj.solutions:
-                    # IS SOLUTION DIR
-                    solution = self.proj.solutions[dir_name]
-                    infos = self.get_info_for_solution(env, solution)
-                elif is_testcase_result_dir(self.proj.solution_id, dir_path):
-                    # IS TESTCASE DIR
-                    solution_name = os.path.basename(
-                        os.path.dirname(os.path.dirname(dir_path))
+        self.dirs_info = {}
+
+    def get_dir_info(self, env, dir_name):
+        if self.dirs_info is None:
+            return None
+        if dir_name not in self.dirs_info:
+            self.dirs_info[dir_name] = self.load_dir_info(env, dir_name)
+        return self.dirs_info[dir_name]
+
+    def load_dir_info(self, env, dir_name):
+        infos = None
+        dir_path = os.path.join(self.path, dir_name)
+        if self.proj is not None:
+            if dir_name in self.proj.solutions:
+                # IS SOLUTION DIR
+                solution = self.proj.solutions[dir_name]
+                infos = self.get_info_for_solution(env, solution)
+            elif is_testcase_result_dir(self.proj.solution_id, dir_path):
+                # IS TESTCASE DIR
+                solution_name = os.path.basename(
+                    os.path.dirname(os.path.dirname(dir_path))
+                )
+                if solution_name in self.proj.solutions:
+                    solution = self.proj.solutions[solution_name]
+                    infos = self.get_info_for_solution(
+                        env, solution, info_for_tests=True, test_name=dir_name
                     )
-                    if solution_name in self.proj.solutions:
-                        solution = self.proj.solutions[solution_name]
-                        infos = self.get_info_for_solution(
-                            env, solution, info_for_tests=True, test_name=dir_name
-                        )
-            result[dir_name] = infos
-        self.dirs_info = result
+        return infos
 
     def get_info_for_solution(
         self, env, solution, info_for_tests=False, test_name=None
@@ -44,7 +44,25 @@ class Environment:
         self.start_with_line_numbers = conf["env"]["start_with_line_numbers"]
         self.tab_size = conf["editor"]["tab_size"]
 
-        self.show_cached_files = False  # *_tags.yaml and *_report.yaml
+        """ testing """
+        # driver for testing containers (docker or fake)
+        self.testing_driver = conf["testing"]["driver"]
+        # number of solutions tested in parallel (0 = number of cpu cores)
+        self.testing_jobs = conf["testing"]["jobs"]
+        # reuse warm docker containers between solutions (removed on exit)
+        self.container_pool = conf["testing"]["container_pool"]
+        # run testing of all students in background (browsing is not blocked)
+        self.testing_background = conf["testing"]["background"]
+        # number of tests of one solution run at once in its container (1 = testsuite.sh)
+        self.testing_parallel_tests = conf["testing"]["parallel_tests"]
+        # resource limits of containers and budget for all of them (see scheduler)
+        self.testing_limits = conf["testing"]["limits"]
+        # output of testing (tail in bytes for debug log, spill whole output to results)
+        self.testing_output_tail = conf["testing"]["output_tail"]
+        self.testing_output_spill = conf["testing"]["output_spill"]
+        self.testing_job = None  # TestingJob()
+
+        self.show_cached_files = False  # *_tags.yaml, *_report.yaml, CACHE_FILES
 
         """ file view/edit """
         self.file_edit_mode = True  # file edit or file management
@@ -3,6 +3,8 @@ import os
 import re
 import traceback
 
+from spef.utils.content_index import open_content_index
+from spef.utils.content_scan import scan_files
 from spef.utils.loading import get_tags_file, load_tags_from_file
 from spef.utils.logger import log
 from spef.utils.match import (
@@ -63,7 +65,7 @@ class Filter:
             # if some filtering has already been done, search for files only in its matches
             # else search all files in root directory
             files = matches if self.path else self.get_files_in_dir_recursive(self.root)
-            matches = self.get_files_by_content(files)
+            matches = self.get_files_by_content(env, files)
 
         if self.tag:
             files = (
@@ -206,29 +208,31 @@ class Filter:
     """
     files: files to filter
     content: content to match
+    * if project uses content index, only candidates from index are scanned
+    * files are scanned in parallel, binary files are skipped (see utils/content_scan.py)
     """
 
-    def get_files_by_content(self, files):
-        content_matches = []
-        exception_catched = []
-        problematic_files = []
-        for file_path in files:
-            try:
-                with open(file_path, "r") as f:
-                    if self.content in f.read():
-                        content_matches.append(file_path)
-            except Exception as err:
-                # if there is some exception, skip this file
-                exception_catched.append((str(err), str(traceback.format_exc())))
-                problematic_files.append(file_path)
-                pass
+    def get_files_by_content(self, env, files):
+        proj = env.cwd.proj
+        if proj is not None and proj.content_index:
+            index = open_content_index(proj.path)
+            if index is not None:
+                try:
+                    files = index.get_candidates(files, self.content)
+                except Exception as err:
+                    log(
+                        "Filter by content | content index | "
+                        + str(err)
+                        + " | "
+                        + str(traceback.format_exc())
+                    )
 
+        content_matches, exception_catched = scan_files(files, self.content)
         if exception_catched:
             pass
             log(
                 "Filter by content | some exception catched (probably bcs of some files that couldnt be opened)..."
             )
-            # log(problematic_files)
             # log(exception_catched)
         return content_matches
 
@@ -244,6 +248,8 @@ class Filter:
                 return set()
 
             tag_matches = set()
+            if env.cwd.proj is not None:
+                env.cwd.proj.preload_solutions()
             for file_path in files:
                 tags = None
                 if env.cwd.proj is not None:
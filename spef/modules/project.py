@@ -1,6 +1,10 @@
+import concurrent.futures
 import datetime
+import multiprocessing
 import os
+import pickle
 import re
+import traceback
 
 from spef.utils.loading import (
     load_tests_tags,
@@ -8,18 +12,161 @@ from spef.utils.loading import (
     load_user_notes_for_solution,
     load_test_notes_for_solution,
 )
-from spef.utils.logger import log, TESTS_DIR
+from spef.utils.index import get_file_signature, get_project_index
+from spef.utils.tag_store import get_tag_store, open_tag_store
+from spef.utils.logger import (
+    log,
+    TESTS_DIR,
+    TEST_FILE,
+    REPORT_DIR,
+    SOLUTION_TAGS,
+    TESTS_TAGS,
+    USER_NOTES_FILE,
+    TEST_NOTES_FILE,
+)
+
+
+# lazy loaded data of solution: {attr: file path relative to solution dir}
+SOLUTION_FILES = {
+    "tags": SOLUTION_TAGS,
+    "test_tags": os.path.join(TESTS_DIR, TESTS_TAGS),
+    "user_notes": os.path.join(REPORT_DIR, USER_NOTES_FILE),
+    "test_notes": os.path.join(REPORT_DIR, TEST_NOTES_FILE),
+}
+
+
+def load_solution_file(solution_path, attr):
+    if attr == "tags":
+        return load_solution_tags(solution_path)
+    elif attr == "test_tags":
+        return load_tests_tags(os.path.join(solution_path, TESTS_DIR))
+    elif attr == "user_notes":
+        return load_user_notes_for_solution(solution_path)
+    elif attr == "test_notes":
+        return load_test_notes_for_solution(solution_path)
+
+
+# runs in worker process of preload, returns pickled data of files [(solution_path, attr)]
+def load_solution_files(files):
+    return [
+        pickle.dumps(load_solution_file(path, attr), protocol=pickle.HIGHEST_PROTOCOL)
+        for path, attr in files
+    ]
+
+
+# minimal number of files to parse, for which preload starts worker processes
+PRELOAD_PROCESS_MIN_FILES = 400
+
+
+def parse_in_processes(files, jobs):
+    chunks = [files[i::jobs] for i in range(jobs)]
+    # spawn (not fork), process can have other threads running (testing, driver loop)
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(jobs, mp_context=context) as executor:
+        results = list(executor.map(load_solution_files, chunks))
+    # put data back to order of files
+    dumped = [None] * len(files)
+    for i, chunk in enumerate(results):
+        dumped[i::jobs] = chunk
+    return dumped
+
+
+"""
+solution loads its tags and notes lazily (on first access) and caches them
+* cached data are loaded again when mtime or size of their file changes
+* data are loaded through project index (if any), so unchanged files are not parsed at all
+* in-memory changes (set_tag, add_user_note...) are kept until the file is changed on disk,
+  so they should be saved to file (as before)
+"""
+
+
+def get_tests_signature(tests_dir, test_dirs):
+    return get_file_signature(tests_dir), tuple(
+        get_file_signature(os.path.join(tests_dir, test_dir)) for test_dir in test_dirs
+    )
 
 
 class Solution:
-    def __init__(self, path):
+    def __init__(self, path, index=None):
         self.path = path
         self.name = os.path.basename(path)
-        self.tags = None
-        self.test_tags = None
-
-        self.test_notes = {}  # notes related to automatic tests
-        self.user_notes = []  # other notes related to solution
+        self.index = index  # ProjectIndex or None
+        self.loaded = {}  # {attr: (signature, data)}
+
+    def get_file_path(self, attr):
+        return os.path.join(self.path, SOLUTION_FILES[attr])
+
+    def is_loaded(self, attr, signature):
+        entry = self.loaded.get(attr)
+        return entry is not None and entry[0] == signature
+
+    # tags in project tag store are not cached by project index (store is fast enough)
+    def get_tag_store(self, attr):
+        if attr in ("tags", "test_tags"):
+            return get_tag_store(self.get_file_path(attr))
+        return None
+
+    def get_signature(self, attr):
+        file_path = self.get_file_path(attr)
+        store = self.get_tag_store(attr)
+        if store is not None:
+            return store.get_signature(file_path)
+        return get_file_signature(file_path)
+
+    def uses_index(self, attr):
+        return self.index is not None and self.get_tag_store(attr) is None
+
+    def get_file_data(self, attr):
+        file_path = self.get_file_path(attr)
+        signature = self.get_signature(attr)
+        if not self.is_loaded(attr, signature):
+            load_data = lambda: load_solution_file(self.path, attr)
+            if self.uses_index(attr):
+                data = self.index.get(file_path, load_data, signature)
+            else:
+                data = load_data()
+            # loading can change signature (tags imported to store)
+            self.loaded[attr] = (self.get_signature(attr), data)
+        return self.loaded[attr][1]
+
+    def set_file_data(self, attr, data, signature=None):
+        if signature is None:
+            signature = self.get_signature(attr)
+        self.loaded[attr] = (signature, data)
+
+    @property
+    def tags(self):
+        return self.get_file_data("tags")
+
+    @tags.setter
+    def tags(self, value):
+        self.set_file_data("tags", value)
+
+    @property
+    def test_tags(self):
+        return self.get_file_data("test_tags")
+
+    @test_tags.setter
+    def test_tags(self, value):
+        self.set_file_data("test_tags", value)
+
+    # notes related to automatic tests
+    @property
+    def test_notes(self):
+        return self.get_file_data("test_notes")
+
+    @test_notes.setter
+    def test_notes(self, value):
+        self.set_file_data("test_notes", value)
+
+    # other notes related to solution
+    @property
+    def user_notes(self):
+        return self.get_file_data("user_notes")
+
+    @user_notes.setter
+    def user_notes(self, value):
+        self.set_file_data("user_notes", value)
 
     def add_user_note(self, text):
         self.user_notes.append(text)
@@ -54,13 +201,83 @@ class Project:
         self.tests_info = []
 
         self.description = ""
+        # wall-clock limit for one test in seconds (0 = no limit), testing is killed after it
         self.test_timeout = 0
+        # where tags of solutions are saved: yaml (*_tags.yaml files) or sqlite (project tag store)
+        self.tag_store = "yaml"
+        # filter by content uses trigram index of project files (see utils/content_index.py)
+        self.content_index = False
 
         self.solutions = None
+        self.tests_names = {}  # {with_check: (signature, test_dirs, names)}
 
     def reload_solutions(self):
         self.solutions = self.load_solutions()
 
+    """
+    loads data of all solutions at once (for views which need whole project, ex. stats)
+    * data of unchanged files are taken from project index
+    * other files are parsed in worker processes (parsing is cpu bound, threads dont help)
+      if there are enough of them and more cpus, otherwise in this process
+    """
+
+    def preload_solutions(self, jobs=None):
+        if not self.solutions:
+            return
+        to_parse = []  # [(solution, attr, signature)]
+        for solution in self.solutions.values():
+            for attr in SOLUTION_FILES:
+                file_path = solution.get_file_path(attr)
+                signature = solution.get_signature(attr)
+                if solution.is_loaded(attr, signature):
+                    continue
+                if not solution.uses_index(attr) or signature is None:
+                    solution.get_file_data(attr)
+                elif solution.index.contains(file_path, signature):
+                    solution.get_file_data(attr)
+                else:
+                    to_parse.append((solution, attr, signature))
+
+        jobs = jobs or os.cpu_count() or 1
+        files = [(solution.path, attr) for solution, attr, _ in to_parse]
+        dumped = None
+        if jobs > 1 and len(files) >= PRELOAD_PROCESS_MIN_FILES:
+            try:
+                dumped = parse_in_processes(files, jobs)
+            except Exception as err:
+                log("preload solutions | " + str(err) + " | " + traceback.format_exc())
+        if dumped is None:
+            dumped = load_solution_files(files)
+
+        for (solution, attr, signature), data in zip(to_parse, dumped):
+            solution.index.put(solution.get_file_path(attr), signature, data)
+            solution.set_file_data(attr, pickle.loads(data), signature)
+
+    """
+    names of tests in project tests dir (dirs with dotest.sh, or all dirs if with_check=False)
+    * tests dir is listed again only if its mtime changes (test added or removed)
+      or mtime of some test dir changes (its dotest.sh added or removed)
+    """
+
+    def get_tests_names(self, with_check=True):
+        tests_dir = os.path.join(self.path, TESTS_DIR)
+        cached = self.tests_names.get(with_check)
+        if cached is not None:
+            signature, test_dirs, names = cached
+            if signature == get_tests_signature(tests_dir, test_dirs):
+                return list(names)
+
+        test_dirs, names = [], []
+        for item in os.listdir(tests_dir):  # list all dirs and files in tests dir
+            path = os.path.join(tests_dir, item)
+            if os.path.isdir(path):
+                test_dirs.append(item)
+                if not with_check or os.path.exists(os.path.join(path, TEST_FILE)):
+                    names.append(item)
+        signature = get_tests_signature(tests_dir, test_dirs)
+        self.tests_names[with_check] = (signature, test_dirs, names)
+        return list(names)
+
     def get_solutions_list(self):
         res = [solution for _, solution in self.solutions.items()]
         return res
@@ -76,21 +293,13 @@ class Project:
                 dirs.add(path)
         solutions = list(dirs)
 
+        # tags and notes of solutions are loaded lazily through project index
+        index = get_project_index(self.path)
+        index.prune(solutions)
+        index.save()
         for solution_dir in solutions:
             solution_id = os.path.basename(solution_dir)
-            solution_data = Solution(solution_dir)
-
-            # load solution tags
-            solution_data.tags = load_solution_tags(solution_dir)
-            solution_data.test_tags = load_tests_tags(
-                os.path.join(solution_dir, TESTS_DIR)
-            )
-
-            # load solution reports
-            solution_data.user_notes = load_user_notes_for_solution(solution_dir)
-            solution_data.test_notes = load_test_notes_for_solution(solution_dir)
-
-            res[solution_id] = solution_data
+            res[solution_id] = Solution(solution_dir, index)
         return res
 
     def get_solution_dirs(self):
@@ -110,6 +319,11 @@ class Project:
             self.sut_ext_variants = data["sut_ext_variants"]
             self.solution_info = data["solution_info"]
             self.tests_info = data["tests_info"]
+            self.test_timeout = data.get("test_timeout", 0)
+            self.tag_store = data.get("tag_store", "yaml")
+            if self.tag_store == "sqlite":
+                open_tag_store(self.path, self.solution_id)
+            self.content_index = data.get("content_index", False)
             self.solutions = self.load_solutions()
             return True
         except:
@@ -130,7 +344,9 @@ class Project:
         self.tests_info = self.get_tests_info()
         self.solutions = self.load_solutions()
 
-        self.test_timeout = 5
+        self.test_timeout = 0
+        self.tag_store = "yaml"
+        self.content_index = False
 
     def to_dict(self):
         return {
@@ -142,6 +358,9 @@ class Project:
             "sut_ext_variants": self.sut_ext_variants,
             "solution_info": self.solution_info,
             "tests_info": self.tests_info,
+            "test_timeout": self.test_timeout,
+            "tag_store": self.tag_store,
+            "content_index": self.content_index,
         }
 
     """
@@ -1,4 +1,4 @@
-import yaml
+from spef.utils.serialization import dump_yaml
 
 
 class Note:
@@ -96,4 +96,4 @@ class Report:
             else:
                 notes[0][0].append(note.text)
         with open(self.path, "w+", encoding="utf8") as f:
-            yaml.dump(notes, f, default_flow_style=False, allow_unicode=True)
+            dump_yaml(notes, f, default_flow_style=False, allow_unicode=True)
@@ -0,0 +1,325 @@
+import atexit
+import contextlib
+import os
+import queue
+import threading
+import time
+import traceback
+
+import spef.utils.logger as logger
+from spef.testing.driver import OutputBuffer, get_driver, run_async
+from spef.testing.scheduler import get_resource_limits
+from spef.testing.staging import tests_stage
+from spef.testing.workspace import Workspace
+
+
+CONTAINER_DIR = "/opt"
+CONTAINER_TESTS_DIR = "/opt/tests"
+
+# all started containers which were not removed yet (from pool or not)
+active_containers = set()
+active_containers_lock = threading.Lock()
+
+
+"""
+container for testing with its own workspace (managed by driver, see driver.py)
+* workspace/shared/ is mounted to CONTAINER_DIR
+* staged tests are mounted read-only to CONTAINER_TESTS_DIR (container holds their reference)
+* container only sleeps, testsuite is run with exec
+* container is started with resource limits (cpus, memory, pids) of testing
+"""
+
+
+class Container:
+    def __init__(self, cid, workspace, driver, tests):
+        self.cid = cid
+        self.workspace = workspace
+        self.driver = driver
+        self.tests = tests  # StagedTests mounted to container
+        self.killed = False
+
+    """
+    run command in container
+    * stdout/stderr = sinks for output (object with write(data))
+    * after timeout all processes in container are killed
+    * returns exit code or None if command was killed (or container was removed meanwhile)
+    """
+
+    def exec(self, args, workdir=None, stdout=None, stderr=None, timeout=None):
+        code = run_async(
+            self.driver.exec(self.cid, args, workdir, stdout, stderr, timeout)
+        )
+        if code is None and not self.killed:
+            self.kill()
+        return None if self.killed else code
+
+    """
+    reset container for next solution (returns False if container cant be reused)
+    * processes and temporary files of previous solution are removed by driver
+    * data of previous solution (sut and run file) are removed from shared dir
+    """
+
+    def reset(self):
+        try:
+            if not run_async(self.driver.reset(self.cid)):
+                return False
+        except Exception as err:
+            logger.log(f"reset container | {self.cid} | {err}")
+            return False
+        err = OutputBuffer()
+        try:
+            code = self.exec(
+                [
+                    "rm",
+                    "-rf",
+                    f"{CONTAINER_DIR}/sut",
+                    f"{CONTAINER_DIR}/{logger.RUN_FILE}",
+                ],
+                stderr=err,
+            )
+        except Exception as e:
+            code, err = 1, str(e)
+        if code != 0:
+            logger.log(f"reset container | {self.cid} | {err}")
+            return False
+        return True
+
+    # kill all processes in container (after timeout), killed container is not reused
+    def kill(self):
+        self.killed = True
+        try:
+            run_async(self.driver.kill(self.cid))
+        except Exception as err:
+            logger.log(f"kill container | {self.cid} | {err}")
+
+    # clean workspace and release staged tests (after container was removed)
+    def clean(self):
+        self.workspace.clean()
+        if self.tests is not None:
+            tests_stage.release(self.tests)
+            self.tests = None
+
+    def remove(self):
+        remove_containers([self])
+        self.clean()
+        with active_containers_lock:
+            active_containers.discard(self)
+
+
+# returns Container or None (tests = StagedTests)
+def start_container(driver, tests, limits=None):
+    workspace = Workspace()
+    try:
+        # create shared dir and mount point before docker does (they would be owned by root)
+        os.makedirs(workspace.tests_dir, exist_ok=True)
+        mounts = [
+            (workspace.shared_dir, CONTAINER_DIR, False),
+            (tests.path, CONTAINER_TESTS_DIR, True),
+        ]
+        start = time.perf_counter()
+        cid = run_async(driver.create(workspace, mounts, limits, CONTAINER_DIR))
+        if cid:
+            container_stats.add_start(time.perf_counter() - start)
+            tests_stage.add_ref(tests)
+            container = Container(cid, workspace, driver, tests)
+            with active_containers_lock:
+                active_containers.add(container)
+            return container
+    except Exception as err:
+        logger.log("start container | " + str(err) + " | " + traceback.format_exc())
+    workspace.clean()
+    return None
+
+
+# remove containers (at once for every driver)
+def remove_containers(containers):
+    by_driver = {}
+    for container in containers:
+        # runs in removed container are not complete (ex. cancelled testing)
+        container.killed = True
+        by_driver.setdefault(container.driver, []).append(container.cid)
+    for driver, cids in by_driver.items():
+        try:
+            run_async(driver.remove(cids))
+        except Exception as err:
+            logger.log(f"remove containers | {err}")
+
+
+"""
+timing stats of containers (logged to debug log)
+* saved time is estimated as average start time * number of reused containers
+"""
+
+
+class ContainerStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = 0
+        self.start_time = 0.0  # total time of `docker run` in seconds
+        self.reused = 0
+
+    def add_start(self, duration):
+        with self.lock:
+            self.started += 1
+            self.start_time += duration
+
+    def add_reuse(self):
+        with self.lock:
+            self.reused += 1
+
+    def summary(self):
+        with self.lock:
+            avg = self.start_time / self.started if self.started else 0.0
+            saved = avg * self.reused
+            return (
+                f"{self.started} containers started (avg {avg:.2f}s), "
+                f"{self.reused} runs in warm container (saved ~{saved:.2f}s)"
+            )
+
+
+container_stats = ContainerStats()
+
+
+"""
+pool of warm containers reused between solutions
+* containers are started lazily, so pool grows to the number of parallel jobs
+* container is reused only for the same staged tests, idle containers with old staged tests
+  (tests were changed) are removed
+* released container is reset (rm -rf /opt/sut /opt/run.sh) and waits for next solution
+* container which cannot be reset is removed
+* all containers are removed on exit
+* there is one pool for every driver
+"""
+
+
+class ContainerPool:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.idle = queue.SimpleQueue()
+        self.containers = set()
+        self.closed = False
+
+    # returns Container or None (if container cannot be started)
+    def acquire(self, driver, tests, limits=None):
+        container, skipped = None, []
+        while container is None:
+            try:
+                idle = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            if idle.tests is tests:
+                container = idle
+            elif idle.tests.current:
+                skipped.append(idle)  # tests of other project
+            else:
+                self.discard(idle)
+        for idle in skipped:
+            self.idle.put(idle)
+        if container is not None:
+            container_stats.add_reuse()
+            return container
+
+        container = start_container(driver, tests, limits)
+        if container is not None:
+            with self.lock:
+                self.containers.add(container)
+        return container
+
+    def release(self, container):
+        with self.lock:
+            closed = self.closed
+        if not closed and not container.killed and container.reset():
+            self.idle.put(container)
+        else:
+            self.discard(container)
+
+    def discard(self, container):
+        with self.lock:
+            self.containers.discard(container)
+        container.remove()
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            containers, self.containers = list(self.containers), set()
+        if containers:
+            remove_containers(containers)
+            for container in containers:
+                container.clean()
+            with active_containers_lock:
+                active_containers.difference_update(containers)
+            logger.log(f"container pool | closed | {container_stats.summary()}")
+
+
+# {driver name: ContainerPool}
+container_pools = {}
+container_pool_lock = threading.Lock()
+
+
+def get_container_pool(driver):
+    with container_pool_lock:
+        pool = container_pools.get(driver.name)
+        if pool is None or pool.closed:
+            pool = ContainerPool()
+            container_pools[driver.name] = pool
+        return pool
+
+
+def close_container_pool():
+    with container_pool_lock:
+        pools = list(container_pools.values())
+        container_pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+# remove all containers (also the ones which are just used for testing)
+def remove_all_containers():
+    close_container_pool()
+    with active_containers_lock:
+        containers = list(active_containers)
+        active_containers.clear()
+    if containers:
+        remove_containers(containers)
+        for container in containers:
+            container.clean()
+
+
+atexit.register(remove_all_containers)
+
+
+"""
+get container for one testsuite run (driver is testing.driver from config)
+* proj tests dir is staged first (only if it changed since last run)
+* container is from pool of warm containers (if env.container_pool is enabled)
+  or fresh container which is removed after the run
+* yields None if tests cannot be staged or container cannot be started
+"""
+
+
+@contextlib.contextmanager
+def testing_container(env, tests_dir):
+    tests = tests_stage.acquire(tests_dir)
+    if tests is None:
+        yield None
+        return
+    try:
+        driver = get_driver(env.testing_driver)
+        limits = get_resource_limits(env)
+        if env.container_pool:
+            pool = get_container_pool(driver)
+            container = pool.acquire(driver, tests, limits)
+            try:
+                yield container
+            finally:
+                if container is not None:
+                    pool.release(container)
+        else:
+            container = start_container(driver, tests, limits)
+            try:
+                yield container
+            finally:
+                if container is not None:
+                    container.remove()
+    finally:
+        tests_stage.release(tests)
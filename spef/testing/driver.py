@@ -0,0 +1,253 @@
+import asyncio
+import os
+import signal
+import threading
+import traceback
+
+import spef.utils.logger as logger
+
+
+# size of chunks read from output of processes (in bytes)
+READ_CHUNK_SIZE = 65536
+# how long output of killed process is read (in seconds)
+KILL_DRAIN_TIMEOUT = 1
+
+
+"""
+one asyncio event loop (in background thread) for all container operations
+* testing threads submit coroutines of driver and wait for their results (run_async)
+* all docker processes of all solutions are managed concurrently by this loop
+"""
+
+
+class DriverLoop:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.loop = None
+        self.thread = None
+
+    def get_loop(self):
+        with self.lock:
+            if self.loop is None or not self.thread.is_alive():
+                self.loop = asyncio.new_event_loop()
+                self.thread = threading.Thread(
+                    target=self.loop.run_forever, name="driver-loop", daemon=True
+                )
+                self.thread.start()
+            return self.loop
+
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.get_loop()).result()
+
+
+driver_loop = DriverLoop()
+
+
+def run_async(coro):
+    return driver_loop.run(coro)
+
+
+# read stream to the end, chunks are passed to sink (object with write(data)) if any
+async def pump_stream(stream, sink=None):
+    while True:
+        chunk = await stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        if sink is not None:
+            sink.write(chunk)
+
+
+"""
+run process and stream its output to sinks
+* on_start(pid) is called when process is started
+* timeout limits run of process and reading of its output (children can keep pipes open)
+* after timeout, whole process group is killed if process was started in new session
+* returns exit code of process or None if it was killed after timeout
+"""
+
+
+def kill_process(proc, group=False):
+    try:
+        if group:
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except ProcessLookupError:
+        pass
+    except Exception as err:
+        logger.log("kill process | " + str(err) + " | " + traceback.format_exc())
+
+
+async def run_process(
+    args, stdout=None, stderr=None, timeout=None, on_start=None, **kwargs
+):
+    proc = await asyncio.create_subprocess_exec(
+        *args,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        **kwargs,
+    )
+    if on_start is not None:
+        on_start(proc.pid)
+    done = asyncio.gather(
+        proc.wait(), pump_stream(proc.stdout, stdout), pump_stream(proc.stderr, stderr)
+    )
+    try:
+        await asyncio.wait_for(asyncio.shield(done), timeout or None)
+        return proc.returncode
+    except asyncio.TimeoutError:
+        pass
+
+    kill_process(proc, group=kwargs.get("start_new_session", False))
+    try:
+        # rest of output (processes which left the group can still hold pipes)
+        await asyncio.wait_for(done, KILL_DRAIN_TIMEOUT)
+    except asyncio.TimeoutError:
+        await proc.wait()
+    return None
+
+
+class OutputBuffer:
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+
+    def get_text(self):
+        return b"".join(self.chunks).decode("utf-8", errors="replace")
+
+
+"""
+driver for containers (async interface)
+* create(workspace, mounts, limits, workdir) -> cid or None
+    mounts = [(host_path, container_path, read_only)]
+* exec(cid, args, workdir, stdout, stderr, timeout) -> exit code or None (timeout)
+    stdout/stderr = sinks for output chunks (object with write(data))
+* copy(cid, src, dst) -> success (src in container, dst on host)
+* kill(cid) - kill all processes in container
+* reset(cid) -> success - kill processes and remove temporary files of previous run,
+    False if container cant be returned to the state of fresh container (it is not reused)
+* remove(cids) - remove containers
+"""
+
+# temporary dirs which are emptied when container is reset
+RESET_DIRS = ["/tmp", "/var/tmp"]
+
+
+class DockerDriver:
+    name = "docker"
+
+    def __init__(self):
+        self.fresh_diffs = {}  # {cid: changes of fresh container (docker diff)}
+
+    async def run_cmd(self, args):
+        out, err = OutputBuffer(), OutputBuffer()
+        code = await run_process(args, out, err)
+        return code, out.get_text(), err.get_text()
+
+    async def create(self, workspace, mounts, limits=None, workdir=None):
+        args = ["docker", "run", "--cidfile", workspace.cid_file, "--rm", "-d"]
+        if workdir is not None:
+            args += ["--workdir", workdir]
+        for host_path, container_path, read_only in mounts:
+            options = "ro,z" if read_only else "z"
+            args += ["-v", f"{host_path}:{container_path}:{options}"]
+        if limits is not None:
+            args += limits.get_docker_args()
+        args += [logger.IMAGE_NAME, "bash", "-c", "while true; do sleep 1; done"]
+        code, out, err = await self.run_cmd(args)
+        if code != 0 or not os.path.exists(workspace.cid_file):
+            logger.log(f"docker run | code {code} | {out} | {err}")
+            return None
+        if err:
+            # ex. warning about unsupported swap limit, container is running anyway
+            logger.log(f"docker run | warning | {err}")
+        with open(workspace.cid_file, "r") as f:
+            cid = f.read().strip()
+        if not cid:
+            return None
+        self.fresh_diffs[cid] = await self.get_diff(cid)
+        return cid
+
+    # returns changes of filesystem of container against its image (without RESET_DIRS)
+    async def get_diff(self, cid):
+        code, out, err = await self.run_cmd(["docker", "diff", cid])
+        if code != 0:
+            logger.log(f"docker diff | {cid} | {err}")
+            return None
+        changes = set(out.splitlines()) - {f"C {path}" for path in RESET_DIRS}
+        return sorted(changes)
+
+    async def exec(
+        self, cid, args, workdir=None, stdout=None, stderr=None, timeout=None
+    ):
+        cmd = ["docker", "exec"]
+        if workdir is not None:
+            cmd += ["--workdir", workdir]
+        return await run_process(cmd + [cid] + list(args), stdout, stderr, timeout)
+
+    async def copy(self, cid, src, dst):
+        code, _, err = await self.run_cmd(["docker", "cp", f"{cid}:{src}", dst])
+        if code != 0:
+            logger.log(f"docker cp | {cid}:{src} -> {dst} | {err}")
+        return code == 0
+
+    async def kill(self, cid):
+        code, _, err = await self.run_cmd(["docker", "kill", cid])
+        if code != 0:
+            logger.log(f"docker kill | {cid} | {err}")
+
+    """
+    reset container for next solution
+    * all processes except init of container are killed (kill -1 doesnt kill the calling shell)
+    * RESET_DIRS are emptied
+    * other changes of filesystem (ex. files in $HOME) cant be undone,
+      so container is reused only if it has the same changes as fresh container
+    """
+
+    async def reset(self, cid):
+        dirs = " ".join(RESET_DIRS)
+        script = f"kill -9 -1 2>/dev/null; find {dirs} -mindepth 1 -delete"
+        code, _, err = await self.run_cmd(["docker", "exec", cid, "bash", "-c", script])
+        if code != 0:
+            logger.log(f"docker reset | {cid} | {err}")
+            return False
+        fresh = self.fresh_diffs.get(cid)
+        diff = await self.get_diff(cid)
+        if fresh is None or diff != fresh:
+            changed = sorted(set(diff or []) - set(fresh or []))
+            logger.log(f"docker reset | {cid} | filesystem changed | {changed[:10]}")
+            return False
+        return True
+
+    async def remove(self, cids):
+        if cids:
+            await self.run_cmd(["docker", "rm", "-f"] + list(cids))
+        for cid in cids:
+            self.fresh_diffs.pop(cid, None)
+
+
+drivers = {}
+drivers_lock = threading.Lock()
+
+
+# returns driver by name (testing.driver in config): docker, local (bwrap/subprocess) or fake (for tests)
+def get_driver(name=None):
+    name = name or "docker"
+    with drivers_lock:
+        if name not in drivers:
+            if name == "fake":
+                from spef.testing.fake_driver import FakeDriver
+
+                drivers[name] = FakeDriver()
+            elif name == "local":
+                from spef.testing.local_driver import LocalDriver
+
+                drivers[name] = LocalDriver()
+            else:
+                if name != "docker":
+                    logger.log(f"get driver | unknown driver '{name}', using docker")
+                drivers[name] = DockerDriver()
+        return drivers[name]
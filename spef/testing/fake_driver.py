@@ -0,0 +1,149 @@
+import asyncio
+import os
+import shutil
+import signal
+import uuid
+
+import spef.utils.logger as logger
+from spef.testing.driver import run_process
+
+
+"""
+in-process fake of container driver (whole testing pipeline can run without docker)
+* container = only mapping of mounted container paths to host paths
+* commands run directly on host, their container paths (args and workdir) are mapped to host paths
+* every command runs in its own session, kill and reset stop all processes of sessions
+  started in container (also background processes of commands which already ended)
+* session id is pid of command, so it is forgotten when no process of session is left
+  (pid can be reused by command of other container)
+* limits and read-only mounts are not enforced (only for testing of spef itself),
+  filesystem is shared with host, so reset doesnt clean anything else
+"""
+
+
+# returns {session: [pids]} of running processes which belong to some of sessions
+def get_session_processes(sessions):
+    processes = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "r") as f:
+                stat = f.read()
+            # pid (comm) state ppid pgrp session ...
+            session = int(stat.rsplit(")", 1)[1].split()[3])
+            if session in sessions:
+                processes.setdefault(session, []).append(int(name))
+        except (OSError, ValueError, IndexError):
+            pass
+    return processes
+
+
+# commands = pids of commands which are still running (leaders of their sessions)
+def kill_sessions(sessions, commands=()):
+    for session, pids in get_session_processes(sessions).items():
+        # leader of session ended, so other process with its pid is not from container
+        if session in pids and session not in commands:
+            continue
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+
+class FakeDriver:
+    name = "fake"
+
+    def __init__(self):
+        self.containers = {}  # {cid: {container_path: host_path}}
+        self.processes = {}  # {cid: set(pids)} of running commands
+        self.sessions = {}  # {cid: set(pids)} of all commands (session ids)
+
+    def map_path(self, cid, path):
+        mounts = self.containers.get(cid, {})
+        for container_path in sorted(mounts, key=len, reverse=True):
+            if path == container_path or path.startswith(container_path + "/"):
+                return mounts[container_path] + path[len(container_path) :]
+        return path
+
+    async def create(self, workspace, mounts, limits=None, workdir=None):
+        cid = uuid.uuid4().hex
+        self.containers[cid] = {c: h for h, c, _ in mounts}
+        self.processes[cid] = set()
+        self.sessions[cid] = set()
+        with open(workspace.cid_file, "w") as f:
+            f.write(cid)
+        return cid
+
+    async def exec(
+        self, cid, args, workdir=None, stdout=None, stderr=None, timeout=None
+    ):
+        if cid not in self.containers:
+            if stderr is not None:
+                stderr.write(f"no such container: {cid}\n".encode())
+            return 1
+        args = [self.map_path(cid, arg) for arg in args]
+        cwd = self.map_path(cid, workdir) if workdir is not None else None
+        pids = self.processes[cid]
+        sessions = self.sessions[cid]
+        started = []
+
+        # session of command is tracked, so it can be killed with the container
+        def track(pid):
+            started.append(pid)
+            pids.add(pid)
+            sessions.add(pid)
+
+        try:
+            return await run_process(
+                args,
+                stdout,
+                stderr,
+                timeout,
+                on_start=track,
+                cwd=cwd,
+                start_new_session=True,
+            )
+        finally:
+            self.end_commands(cid, started)
+
+    # commands ended, their sessions are kept only with background processes
+    def end_commands(self, cid, started):
+        self.processes[cid].difference_update(started)
+        left = get_session_processes(set(started))
+        self.sessions[cid].difference_update(set(started) - set(left))
+
+    async def copy(self, cid, src, dst):
+        src = self.map_path(cid, src)
+        try:
+            if os.path.isdir(src):
+                shutil.copytree(src, dst, symlinks=True, dirs_exist_ok=True)
+            else:
+                shutil.copy2(src, dst)
+            return True
+        except Exception as err:
+            logger.log(f"fake copy | {src} -> {dst} | {err}")
+            return False
+
+    async def kill(self, cid):
+        for pid in self.processes.get(cid, set()):
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except OSError:
+                pass
+        kill_sessions(self.sessions.get(cid, set()), self.processes.get(cid, set()))
+
+    async def reset(self, cid):
+        if cid not in self.containers:
+            return False
+        kill_sessions(self.sessions[cid], self.processes[cid])
+        self.sessions[cid].clear()
+        return True
+
+    async def remove(self, cids):
+        for cid in cids:
+            await self.kill(cid)
+            self.containers.pop(cid, None)
+            self.processes.pop(cid, None)
+            self.sessions.pop(cid, None)
@@ -0,0 +1,214 @@
+import hashlib
+import os
+import traceback
+
+import spef.utils.logger as logger
+from spef.modules.tags import Tags
+from spef.utils.loading import (
+    load_tags,
+    remove_tags_file,
+    save_tags_to_file,
+    load_testsuite_version,
+    load_testcase_tags,
+)
+
+
+# proj/solution/TESTS_DIR/
+FINGERPRINT_FILE = "fingerprint" + logger.TAGS_SUFFIX
+
+
+"""
+fingerprint of testing inputs for solution
+* hash of metadata (path, size, mtime) of all files in solution dir
+  (except test results, reports dir and *_tags.yaml/*_report.yaml files)
+* hash of metadata of all files in proj tests dir (with tags files, ex. versions of tests)
+  and testsuite version, the same fingerprint is the key of staged tests (see staging.py)
+* fingerprint of last successful testsuite run is saved to solution/tests/fingerprint_tags.yaml
+  (together with fingerprint of solution only and versions of tests)
+* solution with the same fingerprint doesnt need to be tested again
+"""
+
+
+def hash_tree(h, path, exclude_dirs=(), with_tags=False):
+    for root, dirs, files in os.walk(path):
+        rel_root = os.path.relpath(root, path)
+        if rel_root == ".":
+            dirs[:] = [d for d in dirs if d not in exclude_dirs]
+        dirs.sort()
+        for file_name in sorted(files):
+            if not with_tags and file_name.endswith(
+                (logger.TAGS_SUFFIX, logger.REPORT_SUFFIX)
+            ):
+                continue
+            st = os.lstat(os.path.join(root, file_name))
+            h.update(f"{rel_root}/{file_name}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+
+
+def get_tests_dir_fingerprint(tests_dir):
+    h = hashlib.sha1()
+    hash_tree(h, tests_dir, with_tags=True)
+    h.update(f"version|{load_testsuite_version(tests_dir)}\n".encode())
+    return h.hexdigest()
+
+
+def get_tests_fingerprint(proj_dir):
+    return get_tests_dir_fingerprint(os.path.join(proj_dir, logger.TESTS_DIR))
+
+
+def get_solution_fingerprint(solution):
+    h = hashlib.sha1()
+    hash_tree(h, solution.path, (logger.RESULTS_SUB_DIR, logger.REPORT_DIR))
+    return h.hexdigest()
+
+
+# returns fingerprint (str) or None if it cant be calculated
+def get_fingerprint(solution, tests_fingerprint, solution_fingerprint=None):
+    try:
+        if solution_fingerprint is None:
+            solution_fingerprint = get_solution_fingerprint(solution)
+        h = hashlib.sha1()
+        h.update(f"tests|{tests_fingerprint}\n".encode())
+        h.update(f"solution|{solution_fingerprint}\n".encode())
+        return h.hexdigest()
+    except Exception as err:
+        logger.log(f"get fingerprint | {solution.name} | {err}")
+        return None
+
+
+# returns {test_name: version} (version from test_tags.yaml, default 1)
+def get_test_versions(tests_dir, test_names):
+    versions = {}
+    for test_name in test_names:
+        testcase_dir = os.path.join(tests_dir, test_name)
+        tags = load_testcase_tags(testcase_dir)
+        args = tags.data.get("version") if tags is not None and tags.data else None
+        versions[test_name] = str(args[0]) if args else "1"
+    return versions
+
+
+def get_fingerprint_file(solution):
+    return os.path.join(solution.path, logger.RESULTS_SUB_DIR, FINGERPRINT_FILE)
+
+
+# returns Tags (empty if fingerprint was not saved yet)
+# yaml file doesnt have to exist (tags can be in tag store of project)
+def load_fingerprint_tags(solution):
+    fingerprint_file = get_fingerprint_file(solution)
+    tags = load_tags(fingerprint_file)
+    if tags is None or not tags.data:
+        return Tags(fingerprint_file, {})
+    return tags
+
+
+def load_fingerprint(solution, tag_name="fingerprint"):
+    args = load_fingerprint_tags(solution).data.get(tag_name)
+    return str(args[0]) if args else None
+
+
+"""
+save fingerprint of testing inputs
+* fingerprint, solution_fingerprint - after successful run of whole testsuite
+* {test}_version - version of every test which was run (see history_test_modified)
+"""
+
+
+def save_fingerprint(
+    solution, fingerprint=None, solution_fingerprint=None, test_versions=None
+):
+    try:
+        tags = load_fingerprint_tags(solution)
+        if fingerprint is not None:
+            tags.set_tag("fingerprint", [fingerprint])
+        if solution_fingerprint is not None:
+            tags.set_tag("solution_fingerprint", [solution_fingerprint])
+        for test_name, version in (test_versions or {}).items():
+            tags.set_tag(f"{test_name}_version", [version])
+        save_tags_to_file(tags)
+    except Exception as err:
+        logger.log("save fingerprint | " + str(err) + " | " + traceback.format_exc())
+
+
+"""
+remove fingerprint after results of solution were cleaned (solution has to be tested again)
+* tests = only results of these tests were cleaned, their versions are removed
+  and fingerprint of whole testsuite (solution fingerprint stays for get_changed_tests)
+"""
+
+
+def clear_fingerprint(solution, tests=None):
+    try:
+        if tests is None:
+            remove_tags_file(get_fingerprint_file(solution))
+            return
+        tags = load_fingerprint_tags(solution)
+        keys = ["fingerprint"] + [f"{test_name}_version" for test_name in tests]
+        if any(key in tags.data for key in keys):
+            for key in keys:
+                tags.remove_tag(key)
+            save_tags_to_file(tags)
+    except Exception as err:
+        logger.log("clear fingerprint | " + str(err) + " | " + traceback.format_exc())
+
+
+# returns list of solutions whose fingerprint changed since last successful testing
+def get_changed_solutions(proj, solutions):
+    tests_fingerprint = get_tests_fingerprint(proj.path)
+    changed = []
+    for solution in solutions:
+        fingerprint = get_fingerprint(solution, tests_fingerprint)
+        if fingerprint is None or fingerprint != load_fingerprint(solution):
+            changed.append(solution)
+    return changed
+
+
+"""
+find tests which have to be run again for solutions (after some tests were modified)
+* returns {solution_name: None or [tests]}
+* None = whole testsuite (solution changed or it wasnt tested whole yet)
+* [tests] = tests whose version differs from version of their last run
+* solutions which dont need testing are not in result
+"""
+
+
+def get_changed_tests(proj, solutions, test_names):
+    versions = get_test_versions(os.path.join(proj.path, logger.TESTS_DIR), test_names)
+    result = {}
+    for solution in solutions:
+        try:
+            tags = load_fingerprint_tags(solution)
+            last_solution_fingerprint = tags.data.get("solution_fingerprint")
+            solution_fingerprint = get_solution_fingerprint(solution)
+            if (
+                not last_solution_fingerprint
+                or str(last_solution_fingerprint[0]) != solution_fingerprint
+            ):
+                result[solution.name] = None
+                continue
+            changed_tests = []
+            for test_name, version in versions.items():
+                last_version = tags.data.get(f"{test_name}_version")
+                if not last_version or str(last_version[0]) != version:
+                    changed_tests.append(test_name)
+            if changed_tests:
+                result[solution.name] = sorted(changed_tests)
+        except Exception as err:
+            logger.log(f"get changed tests | {solution.name} | {err}")
+            result[solution.name] = None
+    return result
+
+
+"""
+merge results of some tests to previous results of solution
+* tags of rerun tests (scoring_{test}, {test}_*) are replaced by new ones
+* tags of other tests are kept
+"""
+
+
+def merge_test_tags(old_data, new_data, tests):
+    merged = {}
+    for key, args in (old_data or {}).items():
+        if any(key == f"scoring_{t}" or key.startswith(f"{t}_") for t in tests):
+            continue
+        merged[key] = args
+    merged.update(new_data or {})
+    return merged
@@ -0,0 +1,137 @@
+import queue
+import threading
+import time
+import traceback
+
+import spef.utils.logger as logger
+from spef.testing.container import remove_all_containers
+from spef.testing.parallel import run_testsuite_parallel
+
+
+# how often is browsing refreshed while some testing job is running (in ms)
+JOB_REFRESH_INTERVAL = 500
+
+
+"""
+environment for testing in background
+* cwd is fixed when job starts (user can browse other dirs while testing)
+* exit mode of this environment means that job is cancelled
+"""
+
+
+class JobEnvironment:
+    def __init__(self, env, cancel_event):
+        self.cwd = env.cwd
+        self.testing_driver = env.testing_driver
+        self.testing_jobs = env.testing_jobs
+        self.container_pool = env.container_pool
+        self.testing_parallel_tests = env.testing_parallel_tests
+        self.testing_limits = env.testing_limits
+        self.testing_output_tail = env.testing_output_tail
+        self.testing_output_spill = env.testing_output_spill
+        self.cancel_event = cancel_event
+
+    def set_exit_mode(self):
+        self.cancel_event.set()
+
+    def is_exit_mode(self):
+        return self.cancel_event.is_set()
+
+
+"""
+testing of more solutions in background thread
+* batches = [(solutions, kwargs for run_testsuite_parallel),...]
+* user logs from job are queued and printed from main thread (flush_logs)
+* cancelled job doesnt start testing of other solutions and removes all containers
+"""
+
+
+class TestingJob:
+    def __init__(self, env, batches):
+        self.batches = batches
+        self.total = sum(len(solutions) for solutions, _ in batches)
+        self.done = 0
+        self.failed = 0
+        self.lock = threading.Lock()
+        self.logs = queue.SimpleQueue()  # (m_type, message)
+        self.cancel_event = threading.Event()
+        self.finished_event = threading.Event()
+        self.env = JobEnvironment(env, self.cancel_event)
+        self.start_time = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.start_time = time.monotonic()
+        self.thread.start()
+
+    def run(self):
+        try:
+            for solutions, kwargs in self.batches:
+                if self.is_cancelled():
+                    break
+                run_testsuite_parallel(
+                    self.env, solutions, self.log, on_done=self.solution_done, **kwargs
+                )
+        except Exception as err:
+            logger.log("testing job | " + str(err) + " | " + traceback.format_exc())
+        finally:
+            self.finished_event.set()
+
+    # add_to_user_logs for worker threads
+    def log(self, env, m_type, message):
+        self.logs.put((m_type, message))
+
+    def solution_done(self, solution, succ):
+        with self.lock:
+            self.done += 1
+            if not succ:
+                self.failed += 1
+
+    def flush_logs(self, env, add_to_user_logs):
+        while True:
+            try:
+                m_type, message = self.logs.get_nowait()
+            except queue.Empty:
+                break
+            add_to_user_logs(env, m_type, message)
+
+    def cancel(self):
+        if not self.cancel_event.is_set():
+            self.cancel_event.set()
+            remove_all_containers()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def is_finished(self):
+        return self.finished_event.is_set()
+
+    def get_eta(self):
+        with self.lock:
+            done, total = self.done, self.total
+        if done == 0 or self.start_time is None:
+            return None
+        elapsed = time.monotonic() - self.start_time
+        return int(elapsed / done * (total - done))
+
+    def get_status(self):
+        with self.lock:
+            done, total, failed = self.done, self.total, self.failed
+        if self.is_cancelled():
+            return f"testing cancelled {done}/{total}"
+        status = f"testing {done}/{total}"
+        if failed:
+            status += f", failed {failed}"
+        eta = self.get_eta()
+        if eta is not None:
+            status += f", ETA {eta // 60}m {eta % 60:02d}s"
+        return status
+
+
+# cancel running job and wait for its end (on exit)
+def stop_testing_job(env):
+    job = env.testing_job
+    if job is not None:
+        job.cancel()
+        job.thread.join()
+        env.testing_job = None
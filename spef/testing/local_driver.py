@@ -0,0 +1,126 @@
+import os
+import resource
+import shutil
+
+import spef.utils.logger as logger
+from spef.testing.driver import run_process
+from spef.testing.fake_driver import FakeDriver
+
+
+"""
+local sandbox driver (without docker daemon, for trusted solutions or re-grading)
+* if bubblewrap (bwrap) is installed, every command runs in its own bwrap sandbox:
+  read-only root, mounts of workspace on container paths (/opt, /opt/tests read-only),
+  private /tmp, pid namespace and network disabled
+* otherwise command runs as plain subprocess on host (container paths are mapped as in fake driver),
+  locks of tests (SANDBOXLOCK of tst) are in workspace of container instead of shared /tmp
+* limit of memory is set as rlimit of command, cpus and pids cant be limited this way
+  (RLIMIT_NPROC counts all processes of user, not processes of one sandbox)
+"""
+
+
+class LocalDriver(FakeDriver):
+    name = "local"
+
+    def __init__(self):
+        super().__init__()
+        self.bwrap = shutil.which("bwrap")
+        self.mounts = {}  # {cid: [(host_path, container_path, read_only)]}
+        self.limits = {}  # {cid: ResourceLimits}
+        self.lock_dirs = {}  # {cid: dir for locks of tests} (without bwrap)
+        logger.log(f"local driver | bwrap: {self.bwrap or 'not found'}")
+
+    async def create(self, workspace, mounts, limits=None, workdir=None):
+        cid = await super().create(workspace, mounts, limits, workdir)
+        self.mounts[cid] = list(mounts)
+        self.limits[cid] = limits
+        if limits is not None and limits.cpus:
+            logger.log(f"local driver | {cid} | limit of cpus is not supported")
+        if limits is not None and limits.pids:
+            logger.log(f"local driver | {cid} | limit of pids is not supported")
+        if not self.bwrap:
+            lock_dir = os.path.join(workspace.path, "tst_locks")
+            os.makedirs(lock_dir, exist_ok=True)
+            self.lock_dirs[cid] = lock_dir
+        return cid
+
+    def get_rlimits(self, cid):
+        limits = self.limits.get(cid)
+        rlimits = []
+        if limits is not None:
+            if limits.memory:
+                rlimits.append((resource.RLIMIT_AS, limits.memory))
+        return rlimits
+
+    def get_bwrap_args(self, cid, workdir):
+        args = [self.bwrap, "--ro-bind", "/", "/", "--dev", "/dev", "--proc", "/proc"]
+        args += ["--tmpfs", "/tmp"]
+        for host_path, container_path, read_only in self.mounts[cid]:
+            args += ["--ro-bind" if read_only else "--bind", host_path, container_path]
+        args += ["--unshare-pid", "--unshare-net", "--die-with-parent"]
+        if workdir is not None:
+            args += ["--chdir", workdir]
+        return args + ["--"]
+
+    async def exec(
+        self, cid, args, workdir=None, stdout=None, stderr=None, timeout=None
+    ):
+        if cid not in self.containers:
+            if stderr is not None:
+                stderr.write(f"no such container: {cid}\n".encode())
+            return 1
+
+        rlimits = self.get_rlimits(cid)
+
+        def set_rlimits():
+            for limit, value in rlimits:
+                resource.setrlimit(limit, (value, value))
+
+        env = None
+        if self.bwrap:
+            cmd, cwd = self.get_bwrap_args(cid, workdir) + list(args), None
+        else:
+            cmd = [self.map_path(cid, arg) for arg in args]
+            cwd = self.map_path(cid, workdir) if workdir is not None else None
+            env = dict(os.environ, SANDBOXLOCK=self.lock_dirs[cid])
+
+        pids = self.processes[cid]
+        sessions = self.sessions[cid]
+        started = []
+
+        def track(pid):
+            started.append(pid)
+            pids.add(pid)
+            sessions.add(pid)
+
+        try:
+            return await run_process(
+                cmd,
+                stdout,
+                stderr,
+                timeout,
+                on_start=track,
+                cwd=cwd,
+                env=env,
+                start_new_session=True,
+                preexec_fn=set_rlimits if rlimits else None,
+            )
+        finally:
+            self.end_commands(cid, started)
+
+    async def reset(self, cid):
+        if not await super().reset(cid):
+            return False
+        lock_dir = self.lock_dirs.get(cid)
+        if lock_dir is not None:
+            # locks of killed tests
+            shutil.rmtree(lock_dir, ignore_errors=True)
+            os.makedirs(lock_dir, exist_ok=True)
+        return True
+
+    async def remove(self, cids):
+        await super().remove(cids)
+        for cid in cids:
+            self.mounts.pop(cid, None)
+            self.limits.pop(cid, None)
+            self.lock_dirs.pop(cid, None)
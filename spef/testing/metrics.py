@@ -0,0 +1,102 @@
+import contextlib
+import datetime
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+
+import spef.utils.logger as logger
+
+
+metrics_file_lock = threading.Lock()
+
+
+"""
+timing of one testsuite run (one solution)
+* phases = {phase: seconds} (clean, docker_run, prepare_data, wait, docker_exec, copy_back, score)
+* tests = {test_name: seconds}
+* record of every run is appended as one json line to proj/reports/testing_metrics.jsonl
+"""
+
+
+class TestingMetrics:
+    def __init__(self, solution_name):
+        self.solution_name = solution_name
+        self.phases = {}
+        self.tests = {}
+        self.start_time = time.perf_counter()
+        self.date = datetime.datetime.now().isoformat(timespec="seconds")
+
+    def add_phase(self, phase, duration):
+        self.phases[phase] = self.phases.get(phase, 0.0) + duration
+
+    @contextlib.contextmanager
+    def span(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(phase, time.perf_counter() - start)
+
+    def add_test(self, test_name, duration):
+        self.tests[test_name] = duration
+
+    # read durations of tests written by tst to results dir (file is removed)
+    def load_test_times(self, results_dir):
+        times_file = os.path.join(results_dir, logger.TEST_TIMES_FILE)
+        if not os.path.exists(times_file):
+            return
+        try:
+            with open(times_file, "r") as f:
+                for line in f:
+                    items = line.split()
+                    if len(items) == 3:
+                        test_name, start, end = items
+                        self.add_test(test_name, float(end) - float(start))
+            os.remove(times_file)
+        except Exception as err:
+            logger.log(f"load test times | {times_file} | {err}")
+
+    def to_dict(self, success):
+        return {
+            "date": self.date,
+            "host": socket.gethostname(),
+            "solution": self.solution_name,
+            "success": success,
+            "total": round(time.perf_counter() - self.start_time, 3),
+            "phases": {p: round(d, 3) for p, d in self.phases.items()},
+            "tests": {t: round(d, 3) for t, d in self.tests.items()},
+        }
+
+
+def get_metrics_file(proj_dir):
+    return os.path.join(proj_dir, logger.REPORT_DIR, logger.TESTING_METRICS_FILE)
+
+
+def save_metrics(proj_dir, metrics, success):
+    try:
+        metrics_file = get_metrics_file(proj_dir)
+        line = json.dumps(metrics.to_dict(success))
+        with metrics_file_lock:
+            os.makedirs(os.path.dirname(metrics_file), exist_ok=True)
+            with open(metrics_file, "a") as f:
+                f.write(line + "\n")
+    except Exception as err:
+        logger.log("save metrics | " + str(err) + " | " + traceback.format_exc())
+
+
+# returns list of records (dicts) from metrics file, broken lines are skipped
+def load_metrics(proj_dir):
+    records = []
+    metrics_file = get_metrics_file(proj_dir)
+    if not os.path.exists(metrics_file):
+        return records
+    with open(metrics_file, "r") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
@@ -0,0 +1,64 @@
+import collections
+
+import spef.utils.logger as logger
+
+
+"""
+last part (tail) of output of process
+* only last `size` bytes are kept in memory, older chunks are dropped
+* total number of bytes is counted, so it is known how much output was skipped
+"""
+
+
+class OutputTail:
+    def __init__(self, size):
+        self.size = max(int(size or 0), 0)
+        self.chunks = collections.deque()
+        self.length = 0  # bytes in chunks
+        self.total = 0  # all bytes written
+
+    def write(self, data):
+        self.total += len(data)
+        if not self.size:
+            return
+        self.chunks.append(data)
+        self.length += len(data)
+        # drop chunks which are whole out of tail
+        while self.chunks and self.length - len(self.chunks[0]) >= self.size:
+            self.length -= len(self.chunks.popleft())
+
+    def get_text(self):
+        data = b"".join(self.chunks)[-self.size :] if self.size else b""
+        text = data.decode("utf-8", errors="replace")
+        skipped = self.total - len(data)
+        if skipped > 0:
+            text = f"... ({skipped} B skipped) ...\n" + text
+        return text
+
+
+"""
+sink for output of command in container (see driver.py)
+* tail of output is kept in memory
+* whole output can be spilled to file (spill_path)
+"""
+
+
+class OutputSink:
+    def __init__(self, tail_size, spill_path=None):
+        self.tail = OutputTail(tail_size)
+        self.spill_file = None
+        if spill_path is not None:
+            try:
+                self.spill_file = open(spill_path, "ab")
+            except Exception as err:
+                logger.log(f"output | cannot open spill file {spill_path} | {err}")
+
+    def write(self, data):
+        self.tail.write(data)
+        if self.spill_file is not None:
+            self.spill_file.write(data)
+
+    def close(self):
+        if self.spill_file is not None:
+            self.spill_file.close()
+            self.spill_file = None
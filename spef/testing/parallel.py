@@ -0,0 +1,111 @@
+import concurrent.futures
+import os
+import threading
+import traceback
+
+import spef.utils.logger as logger
+from spef.testing.container import container_stats
+from spef.testing.tst import run_testsuite
+
+
+""" number of solutions tested at once (0 or less means number of cpu cores) """
+
+
+def get_jobs_count(jobs=None):
+    try:
+        jobs = int(jobs) if jobs is not None else 0
+    except (TypeError, ValueError):
+        logger.log(f"get jobs count | invalid number of jobs '{jobs}'")
+        jobs = 0
+    if jobs < 1:
+        jobs = os.cpu_count() or 1
+    return jobs
+
+
+"""
+user logs from worker threads cant be printed directly (curses is not thread safe)
+so they are buffered for each solution and printed from main thread when its testing is done
+"""
+
+
+class BufferedUserLogs:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.messages = []  # [("type", "message"),...]
+
+    def __call__(self, env, m_type, message):
+        with self.lock:
+            self.messages.append((m_type, message))
+
+    def flush(self, env, add_to_user_logs):
+        with self.lock:
+            messages, self.messages = self.messages, []
+        for m_type, message in messages:
+            add_to_user_logs(env, m_type, message)
+
+
+def test_solution(env, solution, user_logs, **kwargs):
+    if env.is_exit_mode():
+        # testing was cancelled before this solution started
+        return False
+    try:
+        _, succ = run_testsuite(env, solution, user_logs, **kwargs)
+        return succ
+    except Exception as err:
+        logger.log("test solution | " + str(err) + " | " + str(traceback.format_exc()))
+        return False
+
+
+"""
+run testsuite for all solutions, at most `jobs` solutions at once
+* each solution is tested in its own docker container with its own workspace
+* kwargs are passed to run_testsuite (with_logs, run_seq_tests, tests, merge_results)
+* on_done(solution, success) is called from this thread after each solution
+* after exit mode (or ctrl+c) solutions which didnt start are cancelled
+* returns {solution_name: success} (only finished solutions after exit mode)
+"""
+
+
+def run_testsuite_parallel(
+    env, solutions, add_to_user_logs, jobs=None, on_done=None, **kwargs
+):
+    results = {}
+    if not solutions:
+        return results
+
+    jobs = min(get_jobs_count(jobs), len(solutions))
+    logger.log(f"run testsuite parallel | {len(solutions)} solutions, {jobs} jobs")
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=jobs)
+    try:
+        futures = {}
+        for solution in solutions:
+            user_logs = BufferedUserLogs()
+            future = executor.submit(test_solution, env, solution, user_logs, **kwargs)
+            futures[future] = (solution, user_logs)
+
+        for future in concurrent.futures.as_completed(futures):
+            solution, user_logs = futures[future]
+            succ = future.result()
+            results[solution.name] = succ
+
+            add_to_user_logs(env, "info", f"*** testing student '{solution.name}' ***")
+            user_logs.flush(env, add_to_user_logs)
+            if succ:
+                add_to_user_logs(env, "info", f"testing done")
+            else:
+                add_to_user_logs(env, "warning", f"testing failed")
+            if on_done is not None:
+                on_done(solution, succ)
+
+            if env.is_exit_mode():
+                # dont start testing of other solutions
+                break
+    except KeyboardInterrupt:
+        # ctrl+c (grade), solutions which are already tested are finished
+        env.set_exit_mode()
+        add_to_user_logs(env, "warning", "testing interrupted")
+    finally:
+        executor.shutdown(cancel_futures=env.is_exit_mode())
+    logger.log(f"run testsuite parallel | done | {container_stats.summary()}")
+    return results
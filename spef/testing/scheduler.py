@@ -0,0 +1,128 @@
+import contextlib
+import os
+import re
+import threading
+
+import spef.utils.logger as logger
+
+
+# how often waiting run checks if testing was cancelled (in seconds)
+ADMIT_CHECK_INTERVAL = 0.5
+
+
+def parse_memory(value):
+    # "512m" -> bytes (docker units b, k, m, g), 0 = no limit
+    if not value:
+        return 0
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([bkmg]?)b?\s*", str(value).lower())
+    if match is None:
+        logger.log(f"parse memory | invalid memory limit '{value}'")
+        return 0
+    number, unit = match.groups()
+    return int(float(number) * 1024 ** "bkmg".index(unit or "b"))
+
+
+"""
+resource limits of one testing container (from testing.limits in config)
+* cpus = number of cpus (can be fractional), memory = bytes, pids = max number of processes
+* 0 means no limit
+"""
+
+
+class ResourceLimits:
+    def __init__(self, cpus=0, memory=0, pids=0):
+        self.cpus = cpus
+        self.memory = memory
+        self.pids = pids
+
+    def get_docker_args(self):
+        args = []
+        if self.cpus > 0:
+            args += ["--cpus", str(self.cpus)]
+        if self.memory > 0:
+            # without swap, so memory limit is really a limit
+            args += ["--memory", f"{self.memory}b", "--memory-swap", f"{self.memory}b"]
+        if self.pids > 0:
+            args += ["--pids-limit", str(self.pids)]
+        return args
+
+    def __str__(self):
+        return f"cpus {self.cpus or '-'}, memory {self.memory or '-'} B, pids {self.pids or '-'}"
+
+
+# returns ResourceLimits for testing containers of env
+def get_resource_limits(env):
+    conf = env.testing_limits or {}
+    try:
+        cpus = float(conf.get("cpus") or 0)
+        pids = int(conf.get("pids") or 0)
+    except (TypeError, ValueError):
+        logger.log(f"resource limits | invalid limits {conf}")
+        cpus, pids = 0, 0
+    return ResourceLimits(cpus, parse_memory(conf.get("memory")), pids)
+
+
+"""
+host-wide budget of resources for testing runs
+* run is admitted only if limits of its container fit into the rest of budget
+  (cpu budget = host_cpus or number of cpu cores, memory budget = host_memory or unlimited)
+* run which doesnt fit waits until some other run ends or testing is cancelled
+* run which is bigger than whole budget is admitted only when nothing else runs
+"""
+
+
+class ResourceScheduler:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.running = 0
+        self.used_cpus = 0.0
+        self.used_memory = 0
+
+    def fits(self, limits, cpus_budget, memory_budget):
+        if self.running == 0:
+            return True
+        if limits.cpus and self.used_cpus + limits.cpus > cpus_budget:
+            return False
+        if memory_budget and limits.memory:
+            if self.used_memory + limits.memory > memory_budget:
+                return False
+        return True
+
+    # returns True if run was admitted, False if testing was cancelled while waiting
+    def acquire(self, env, limits):
+        conf = env.testing_limits or {}
+        try:
+            cpus_budget = float(conf.get("host_cpus") or 0)
+        except (TypeError, ValueError):
+            cpus_budget = 0
+        cpus_budget = cpus_budget or os.cpu_count() or 1
+        memory_budget = parse_memory(conf.get("host_memory"))
+
+        with self.cond:
+            while not self.fits(limits, cpus_budget, memory_budget):
+                if env.is_exit_mode():
+                    return False
+                self.cond.wait(ADMIT_CHECK_INTERVAL)
+            self.running += 1
+            self.used_cpus += limits.cpus
+            self.used_memory += limits.memory
+            return True
+
+    def release(self, limits):
+        with self.cond:
+            self.running -= 1
+            self.used_cpus -= limits.cpus
+            self.used_memory -= limits.memory
+            self.cond.notify_all()
+
+    @contextlib.contextmanager
+    def admit(self, env, limits):
+        admitted = self.acquire(env, limits)
+        try:
+            yield admitted
+        finally:
+            if admitted:
+                self.release(limits)
+
+
+resource_scheduler = ResourceScheduler()
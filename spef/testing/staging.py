@@ -0,0 +1,215 @@
+import atexit
+import errno
+import fcntl
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import spef.utils.logger as logger
+from spef.testing.fingerprint import get_tests_dir_fingerprint
+from spef.testing.workspace import WORKSPACE_PREFIX
+
+
+FICLONE = 0x40049409  # ioctl for reflink (linux/fs.h)
+
+
+"""
+copy of directory tree for testing
+* every file is reflinked (copy on write) if filesystem supports it (btrfs, xfs)
+* otherwise it is hardlinked if it is allowed (link=True and same filesystem),
+  only for trees which are not used anymore at src (results moved from workspace),
+  solution is writable in container (chmod, make...) and tests are edited in place
+  while old stage is still mounted (and relabeled with :z), so hardlinks would change them
+* otherwise it is copied
+* method which failed once is not tried again for other files in the tree
+"""
+
+
+class StageStats:
+    def __init__(self):
+        self.counts = {"rename": 0, "reflink": 0, "link": 0, "copy": 0}
+        self.copied_bytes = 0  # bytes really written to disk
+        self.time = 0.0
+
+    def __str__(self):
+        counts = ", ".join(f"{m} {c}" for m, c in self.counts.items())
+        return f"{self.time:.3f}s ({counts}, copied {self.copied_bytes} B)"
+
+
+def reflink_file(src, dst):
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        try:
+            fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+        except OSError:
+            os.remove(dst)
+            raise
+    shutil.copystat(src, dst)
+
+
+# returns StageStats
+def stage_tree(src, dst, link=True, ignore=None):
+    stats = StageStats()
+    methods = ["reflink", "link", "copy"] if link else ["reflink", "copy"]
+
+    def stage_file(src_file, dst_file):
+        while True:
+            method = methods[0]
+            try:
+                if method == "reflink":
+                    reflink_file(src_file, dst_file)
+                elif method == "link":
+                    os.link(src_file, dst_file)
+                else:
+                    shutil.copy2(src_file, dst_file)
+                    stats.copied_bytes += os.path.getsize(dst_file)
+                stats.counts[method] += 1
+                return dst_file
+            except OSError as err:
+                if method == "copy" or err.errno == errno.ENOENT:
+                    raise
+                methods.pop(0)
+
+    start = time.perf_counter()
+    shutil.copytree(
+        src,
+        dst,
+        symlinks=True,
+        ignore=ignore,
+        copy_function=stage_file,
+        dirs_exist_ok=True,
+    )
+    stats.time = time.perf_counter() - start
+    return stats
+
+
+def is_owned_by_user(path):
+    uid = os.getuid()
+    if os.lstat(path).st_uid != uid:
+        return False
+    for root, dirs, files in os.walk(path):
+        for name in dirs + files:
+            if os.lstat(os.path.join(root, name)).st_uid != uid:
+                return False
+    return True
+
+
+"""
+move directory tree (results from workspace back to solution)
+* whole tree is renamed if dst doesnt exist and both are on the same filesystem
+* files created in container by other user (root) are copied (reflink or copy),
+  so they can be edited or removed later from spef
+* returns StageStats
+"""
+
+
+def move_tree(src, dst):
+    stats = StageStats()
+    start = time.perf_counter()
+    owned = is_owned_by_user(src)
+    if owned and not os.path.exists(dst):
+        try:
+            os.rename(src, dst)
+            stats.counts["rename"] += 1
+            stats.time = time.perf_counter() - start
+            return stats
+        except OSError:
+            pass
+    return stage_tree(src, dst, link=owned)
+
+
+"""
+project tests dir staged once for all testsuite runs
+* staged dir is mounted read-only to every container (CONTAINER_TESTS_DIR)
+* files are reflinked or copied, never hardlinked (editing of tests in project
+  would change tests of running containers)
+* key of staged tests is fingerprint of tests dir (metadata of all its files, see fingerprint.py),
+  if tests change, they are staged to new dir (containers with old dir keep it mounted)
+* every user of staged tests (testsuite run, container) holds its reference,
+  old staged dir is removed when it is not used anymore
+* all staged dirs are removed on exit
+"""
+
+
+class StagedTests:
+    def __init__(self, tests_dir, fingerprint, path):
+        self.tests_dir = tests_dir
+        self.fingerprint = fingerprint
+        self.path = path
+        self.refs = 0
+        self.current = True  # False = tests were staged again to other dir
+
+
+class TestsStage:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = {}  # {tests_dir: StagedTests}
+        self.staged = set()  # all StagedTests whose dirs exist
+
+    # returns StagedTests with reference for caller (see release) or None if staging failed
+    def acquire(self, tests_dir):
+        tests_dir = os.path.realpath(tests_dir)
+        with self.lock:
+            try:
+                fingerprint = get_tests_dir_fingerprint(tests_dir)
+                staged = self.current.get(tests_dir)
+                if (
+                    staged is None
+                    or staged.fingerprint != fingerprint
+                    or not os.path.isdir(staged.path)
+                ):
+                    path = tempfile.mkdtemp(prefix=WORKSPACE_PREFIX + "tests_")
+                    try:
+                        stats = stage_tree(tests_dir, path, link=False)
+                    except Exception:
+                        shutil.rmtree(path, ignore_errors=True)
+                        raise
+                    if staged is not None:
+                        staged.current = False
+                        self.remove_unused(staged)
+                    staged = StagedTests(tests_dir, fingerprint, path)
+                    self.current[tests_dir] = staged
+                    self.staged.add(staged)
+                    logger.log(f"stage tests | {tests_dir} -> {path} | {stats}")
+                staged.refs += 1
+                return staged
+            except Exception as err:
+                logger.log(f"stage tests | {tests_dir} | {err}")
+                return None
+
+    def add_ref(self, staged):
+        with self.lock:
+            staged.refs += 1
+
+    def release(self, staged):
+        with self.lock:
+            staged.refs -= 1
+            self.remove_unused(staged)
+
+    # with lock
+    def remove_unused(self, staged):
+        if staged.refs > 0 or staged.current or staged not in self.staged:
+            return
+        self.staged.discard(staged)
+        try:
+            shutil.rmtree(staged.path)
+        except Exception as err:
+            logger.log(f"clean staged tests | {staged.path} | {err}")
+
+    def clean(self):
+        with self.lock:
+            staged_list = list(self.staged)
+            self.staged.clear()
+            self.current.clear()
+        for staged in staged_list:
+            try:
+                if os.path.exists(staged.path):
+                    shutil.rmtree(staged.path)
+            except Exception as err:
+                logger.log(f"clean staged tests | {staged.path} | {err}")
+
+
+tests_stage = TestsStage()
+
+atexit.register(tests_stage.clean)
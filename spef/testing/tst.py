@@ -1,29 +1,43 @@
+import concurrent.futures
 import os
 import shutil
 import stat
-import subprocess
 import datetime
+import time
 import traceback
 
 import spef.utils.logger as logger
+from spef.modules.tags import Tags
 from spef.utils.loading import (
-    load_testsuite_tags,
+    load_tags,
+    load_testsuite_version,
     save_tags_to_file,
     load_sum_equation_from_file,
 )
-from spef.utils.parsing import parse_sum_equation
+from spef.utils.index import get_file_signature
+from spef.utils.parsing import (
+    compile_sum_equation,
+    evaluate_sum_equation,
+    calculate_equation,
+)
+from spef.utils.match import get_tests_names
+from spef.testing.container import testing_container
+from spef.testing.metrics import TestingMetrics, save_metrics
+from spef.testing.output import OutputSink
+from spef.testing.scheduler import get_resource_limits, resource_scheduler
+from spef.testing.staging import stage_tree, move_tree
+from spef.testing.fingerprint import (
+    get_fingerprint,
+    get_solution_fingerprint,
+    get_test_versions,
+    clear_fingerprint,
+    save_fingerprint,
+    merge_test_tags,
+)
 
 
-CONTAINER_DIR = "/opt"
-CONTAINER_TESTS_DIR = "/opt/tests"
 CONTAINER_SUT_DIR = "/opt/sut/"
-CONTAINER_RUN_FILE = "/opt/tests/run.sh"
-
-
-SHARED_DIR = os.path.join(logger.TMP_DIR, "docker_shared")
-SHARED_TESTS_DIR = os.path.join(logger.TMP_DIR, "docker_shared/tests")
-SHARED_SUT_DIR = os.path.join(logger.TMP_DIR, "docker_shared/sut")
-SHARED_RUN_FILE = os.path.join(logger.TMP_DIR, "docker_shared/tests/run.sh")
+CONTAINER_RUN_FILE = "/opt/run.sh"
 
 # shell functions
 TST_FCE_DIR = "src"
@@ -33,8 +47,45 @@ SRC_RUN_TESTSUITE_FILE = os.path.join(logger.DATA_DIR, "run_testsuite.sh")
 SRC_RUN_TESTS_FILE = os.path.join(logger.DATA_DIR, "run_tests.sh")
 
 
+"""
+run testsuite for solution and save timing of its phases and tests (see metrics)
+"""
+
+
 def run_testsuite(
-    env, solution, add_to_user_logs, with_logs=True, run_seq_tests=False, tests=None
+    env,
+    solution,
+    add_to_user_logs,
+    with_logs=True,
+    run_seq_tests=False,
+    tests=None,
+    merge_results=False,
+):
+    metrics = TestingMetrics(solution.name if solution else None)
+    env, succ = run_testsuite_with_metrics(
+        env,
+        solution,
+        add_to_user_logs,
+        metrics,
+        with_logs=with_logs,
+        run_seq_tests=run_seq_tests,
+        tests=tests,
+        merge_results=merge_results,
+    )
+    if env.cwd.proj and solution:
+        save_metrics(env.cwd.proj.path, metrics, succ)
+    return env, succ
+
+
+def run_testsuite_with_metrics(
+    env,
+    solution,
+    add_to_user_logs,
+    metrics,
+    with_logs=True,
+    run_seq_tests=False,
+    tests=None,
+    merge_results=False,
 ):
     try:
         if not env.cwd.proj or not solution:
@@ -66,59 +117,120 @@ def run_testsuite(
             ############### 2. CLEAN SOLUTION ###############
             if with_logs:
                 add_to_user_logs(env, "info", f"cleaning tests results...")
-            clean_test(solution)
-
-            ############### 3. PREPARE DATA ###############
-            if with_logs:
-                add_to_user_logs(env, "info", f"preparing data for testing...")
-            if run_seq_tests and tests:
-                data_ok = prepare_data(env, solution.path, SRC_RUN_TESTS_FILE)
-            else:
-                data_ok = prepare_data(env, solution.path, SRC_RUN_TESTSUITE_FILE)
-            if not data_ok:
+            # results of selected tests are merged to previous results (if merge_results)
+            merge_results = merge_results and run_seq_tests and tests
+            with metrics.span("clean"):
+                if merge_results:
+                    old_tests_tags = load_tags(get_tests_tags_file(solution))
+                    clean_test(solution, tests=tests)
+                else:
+                    clean_test(solution)
+
+            # proj tests dir has to be complete before it is staged for the container
+            with metrics.span("prepare_data"):
+                tests_ok = prepare_tests(env)
+            if not tests_ok:
                 logger.log("run testsuite | problem with testing data")
                 add_to_user_logs(env, "error", f"problem with testing data...")
                 return env, False
 
-            ############### 4. RUN TESTSUITE ###############
-            f1, f2, f3 = with_logs, run_seq_tests, tests
-            succ = run_testsuite_in_docker(
-                env,
-                solution.path,
-                fut,
-                add_to_user_logs,
-                with_logs=f1,
-                run_seq_tests=f2,
-                tests=f3,
-            )
-            if not succ:
+            # every run has its own container with workspace (warm one from pool or new one)
+            if with_logs:
+                add_to_user_logs(env, "info", f"creating docker container...")
+            start = time.perf_counter()
+            tests_dir = os.path.join(env.cwd.proj.path, logger.TESTS_DIR)
+            with testing_container(env, tests_dir) as container:
+                metrics.add_phase("docker_run", time.perf_counter() - start)
+                if container is None:
+                    add_to_user_logs(env, "error", f"cannot create docker container...")
+                    return env, False
+
+                ############### 3. PREPARE DATA ###############
+                if with_logs:
+                    add_to_user_logs(env, "info", f"preparing data for testing...")
+                # tests run one by one (also in parallel mode) dont use testsuite.sh
+                if (run_seq_tests and tests) or env.testing_parallel_tests > 1:
+                    run_file = SRC_RUN_TESTS_FILE
+                else:
+                    run_file = SRC_RUN_TESTSUITE_FILE
+                with metrics.span("prepare_data"):
+                    data_ok = prepare_data(
+                        env, solution.path, run_file, container.workspace
+                    )
+                if not data_ok:
+                    logger.log("run testsuite | problem with testing data")
+                    add_to_user_logs(env, "error", f"problem with testing data...")
+                    return env, False
+
+                # fingerprint of testing inputs and versions of tests (saved after successful run)
+                # versions are from staged tests (tests which are really run)
+                staged_dir = container.tests.path
+                fingerprint, solution_fingerprint = None, None
+                if run_seq_tests and tests:
+                    test_versions = get_test_versions(staged_dir, tests)
+                else:
+                    test_versions = get_test_versions(staged_dir, get_tests_names(env))
+                    solution_fingerprint = get_solution_fingerprint(solution)
+                    fingerprint = get_fingerprint(
+                        solution, container.tests.fingerprint, solution_fingerprint
+                    )
+
+                ############### 4. RUN TESTSUITE ###############
+                # wait until resources for the run are free (host-wide budget)
+                limits = get_resource_limits(env)
+                start = time.perf_counter()
+                with resource_scheduler.admit(env, limits) as admitted:
+                    metrics.add_phase("wait", time.perf_counter() - start)
+                    if not admitted:
+                        add_to_user_logs(env, "warning", f"testing cancelled...")
+                        return env, False
+                    f1, f2, f3 = with_logs, run_seq_tests, tests
+                    succ = run_testsuite_in_docker(
+                        env,
+                        solution.path,
+                        fut,
+                        add_to_user_logs,
+                        container,
+                        with_logs=f1,
+                        run_seq_tests=f2,
+                        tests=f3,
+                        metrics=metrics,
+                    )
+            if not succ or env.is_exit_mode():
+                # cancelled testing doesnt save fingerprint (solution is tested again)
                 logger.log("run testsuite | problem with testsuite run in docker")
                 return env, False
+            if merge_results and old_tests_tags is not None:
+                new_tests_tags = load_tags(get_tests_tags_file(solution))
+                if new_tests_tags is not None:
+                    new_tests_tags.data = merge_test_tags(
+                        old_tests_tags.data, new_tests_tags.data, tests
+                    )
+                    save_tags_to_file(new_tests_tags)
             # reload tests tags for solution after testsuite is done
             solution.reload_test_tags()
+            save_fingerprint(solution, fingerprint, solution_fingerprint, test_versions)
 
             # get testsuite version and add tag "testsuite_version" to solution tags
             tests_dir = os.path.join(env.cwd.proj.path, logger.TESTS_DIR)
-            tests_tags = load_testsuite_tags(tests_dir)
-            if tests_tags is not None and len(tests_tags) > 0:
-                version_args = tests_tags.get_args_for_tag("version")
-                if version_args is not None:
-                    tst_version = list(version_args)[0]
-                    solution.tags.set_tag("testsuite_version", [tst_version])
+            tst_version = load_testsuite_version(tests_dir)
+            if tst_version is not None:
+                solution.tags.set_tag("testsuite_version", [tst_version])
 
         # get datetime and add tag "last_testing" to solution tags
         date_time = datetime.datetime.now().strftime("%d/%m/%y-%H:%M")
         solution.tags.set_tag("last_testing", [date_time])
 
         ############### 5. CALCULATE SCORE ###############
-        total_score = calculate_score(env, solution)
-        # if found some tags from sum equation
-        if total_score is not None:
-            score, bonus = total_score
-            solution.tags.set_tag("score", [score])
-            if bonus > 0:
-                solution.tags.set_tag("score_bonus", [bonus])
-        save_tags_to_file(solution.tags)
+        with metrics.span("score"):
+            total_score = calculate_score(env, solution)
+            # if found some tags from sum equation
+            if total_score is not None:
+                score, bonus = total_score
+                solution.tags.set_tag("score", [score])
+                if bonus > 0:
+                    solution.tags.set_tag("score_bonus", [bonus])
+            save_tags_to_file(solution.tags)
 
     except Exception as err:
         logger.log("run testsuite | " + str(err) + " | " + str(traceback.format_exc()))
@@ -128,8 +240,9 @@ def run_testsuite(
     return env, True
 
 
-def prepare_data(env, solution_dir, run_file):
-    if not env.cwd.proj or not solution_dir:
+# check proj tests dir (and add bash functions for tests to it)
+def prepare_tests(env):
+    if not env.cwd.proj:
         return False
 
     # 1. check necessary dirs and files
@@ -162,16 +275,29 @@ def prepare_data(env, solution_dir, run_file):
     if not bash_tests_ok:
         logger.log("prepare data | problem with bash functions for tests")
         return False
+    return True
+
+
+# copy data for testing to shared dir of workspace (tests are already staged)
+def prepare_data(env, solution_dir, run_file, workspace):
+    if not env.cwd.proj or not solution_dir:
+        return False
 
-    # 3. copy data for testing to shared dir
     try:
-        os.makedirs(SHARED_DIR, exist_ok=True)
-        # proj/tests/ -> /docker_shared/tests/
-        shutil.copytree(tests_dir, SHARED_TESTS_DIR)
-        # proj/xlogin/ -> /docker_shared/sut/
-        shutil.copytree(solution_dir, SHARED_SUT_DIR)
-        shutil.copyfile(run_file, SHARED_RUN_FILE)
-        os.mkdir(os.path.join(SHARED_SUT_DIR, logger.RESULTS_SUB_DIR))
+        os.makedirs(workspace.shared_dir, exist_ok=True)
+        # proj/xlogin/ -> workspace/shared/sut/ (reflink or copy, never hardlink)
+        # without previous test results (they are kept when only some tests are run)
+        stats = stage_tree(
+            solution_dir,
+            workspace.sut_dir,
+            link=False,
+            ignore=lambda d, names: (
+                [logger.RESULTS_SUB_DIR] if os.path.samefile(d, solution_dir) else []
+            ),
+        )
+        logger.log(f"prepare data | stage solution '{solution_dir}' | {stats}")
+        shutil.copyfile(run_file, workspace.run_file)
+        os.mkdir(workspace.results_dir)
     except Exception as err:
         logger.log("prepare data | copy data | " + str(err))
         return False
@@ -214,122 +340,219 @@ def run_testsuite_in_docker(
     solution_dir,
     fut,
     add_to_user_logs,
+    container,
     with_logs=True,
     run_seq_tests=False,
     tests=None,
+    metrics=None,
 ):
     succ = True
+    if metrics is None:
+        metrics = TestingMetrics(os.path.basename(solution_dir))
     try:
-        # create container from image `test` (IMAGE_NAME)
         if with_logs:
-            add_to_user_logs(env, "info", f"creating docker container...")
-
-        container_cid_file = "/tmp/docker.cid"
-        if os.path.exists(container_cid_file):
-            os.remove(container_cid_file)
-        output = subprocess.run(
-            f"docker run --cidfile {container_cid_file} --rm -d --workdir {CONTAINER_DIR} -v {SHARED_DIR}:{CONTAINER_DIR}:z {logger.IMAGE_NAME} bash -c".split(
-                " "
-            )
-            + ["while true; do sleep 1; done"],
-            capture_output=True,
-        )
-        output_out = str(output.stdout.decode("utf-8"))
-        output_err = str(output.stderr.decode("utf-8"))
-        logger.log(f"docker run stdout | {output_out}")
-        logger.log(f"docker run stderr | {output_err}")
-        if not output_err:
-            with open(container_cid_file, "r") as f:
-                cid = f.read()
-
-            if with_logs:
-                add_to_user_logs(env, "info", f"running testsuite...")
-
+            add_to_user_logs(env, "info", f"running testsuite...")
+
+        test_timeout = env.cwd.proj.test_timeout or 0
+        if env.testing_parallel_tests > 1:
+            if not (run_seq_tests and tests):
+                tests = sorted(get_tests_names(env))
+            with metrics.span("docker_exec"):
+                code = run_tests_parallel_in_docker(
+                    env, container, fut, tests, test_timeout, metrics
+                )
+            timeout = test_timeout
+        else:
             if run_seq_tests and tests:
                 # run_tests tst_file tests_dir TESTS_TAGS RESULTS_DIR login fut tests
                 test_list = " ".join(tests)
-                command = f"{CONTAINER_RUN_FILE} /opt/tests/src/tst /opt/tests tests_tags.yaml {logger.RESULTS_SUB_DIR} sut {fut} {test_list}"
+                command = f"{CONTAINER_RUN_FILE} /opt/tests/src/tst /opt/tests {logger.TESTS_TAGS} {logger.RESULTS_SUB_DIR} sut {fut} {test_list}"
+                timeout = test_timeout * len(tests)
             else:
                 # run_testsuite /opt/tests/src /opt/tests /opt/sut/tests_tags.yaml tests sut {fut}
-                command = f"{CONTAINER_RUN_FILE} /opt/tests/src /opt/tests tests_tags.yaml {logger.RESULTS_SUB_DIR} sut {fut}"
-
-            output = subprocess.run(
-                f"docker exec --workdir {CONTAINER_SUT_DIR} {cid} bash {command}".split(
-                    " "
-                ),
-                capture_output=True,
+                command = f"{CONTAINER_RUN_FILE} /opt/tests/src /opt/tests {logger.TESTS_TAGS} {logger.RESULTS_SUB_DIR} sut {fut}"
+                timeout = test_timeout * len(get_tests_names(env))
+            with metrics.span("docker_exec"):
+                code = exec_in_docker(env, container, command, timeout)
+
+        # results are not complete, they are not moved to solution
+        if env.is_exit_mode():
+            add_to_user_logs(env, "warning", f"testing cancelled...")
+            return False
+        if code is None:
+            # processes in container were killed
+            add_to_user_logs(
+                env, "error", f"testing killed after timeout ({timeout}s)..."
             )
-            result = output.stdout.decode("utf-8")
-            err = output.stderr.decode("utf-8")
-            logger.log("docker exec stdout | " + str(result))
-            logger.log("docker exec stderr | " + str(err))
-
-            # remove container
-            out = subprocess.run(f"docker rm -f {cid}".split(" "), capture_output=True)
+            return False
+        if code != 0:
+            add_to_user_logs(env, "error", f"testing failed (exit code {code})...")
+            return False
 
-            if with_logs:
-                add_to_user_logs(env, "info", f"getting results from tests...")
-
-            # get results from test script
-            docker_results = os.path.join(SHARED_SUT_DIR, logger.RESULTS_SUB_DIR)
-            student_results = os.path.join(solution_dir, logger.RESULTS_SUB_DIR)
-            shutil.copytree(docker_results, student_results, dirs_exist_ok=True)
-        else:
-            add_to_user_logs(env, "error", f"cannot create docker container...")
-            succ = False
+        if with_logs:
+            add_to_user_logs(env, "info", f"getting results from tests...")
+
+        # get results from test script (moved, they are not needed in workspace)
+        docker_results = container.workspace.results_dir
+        student_results = os.path.join(solution_dir, logger.RESULTS_SUB_DIR)
+        metrics.load_test_times(docker_results)
+        with metrics.span("copy_back"):
+            stats = move_tree(docker_results, student_results)
+        logger.log(f"run testsuite | move results '{student_results}' | {stats}")
     except Exception as err:
         logger.log("run testsuite | " + str(err) + " | " + str(traceback.format_exc()))
         succ = False
 
+    # container is removed (or reset and returned to pool) after the run
+    return succ
+
+
+"""
+run command in container
+* output is streamed, only its tail (testing.output_tail bytes) is kept in memory for debug log
+* whole output can be spilled to files in results dir ({name}_stdout.log, {name}_stderr.log)
+* timeout = wall-clock limit in seconds (0 or None = no limit)
+* after timeout whole container is killed (killing of docker exec doesnt stop processes in it)
+* returns exit code of command or None if it was killed (or container was removed)
+"""
+
+
+def exec_in_docker(env, container, command, timeout=None, name="testsuite"):
+    spill_out, spill_err = None, None
+    if env.testing_output_spill:
+        results_dir = container.workspace.results_dir
+        spill_out = os.path.join(results_dir, f"{name}_stdout.log")
+        spill_err = os.path.join(results_dir, f"{name}_stderr.log")
+    out = OutputSink(env.testing_output_tail, spill_out)
+    err = OutputSink(env.testing_output_tail, spill_err)
     try:
-        # clear temporary files and dirs
-        # rm -rf docker_shared
-        # rm /tmp/docker.cid
-        # docker rm -f {cid}
-        if os.path.exists(container_cid_file):
-            os.remove(container_cid_file)
-        if os.path.exists(SHARED_DIR):
-            shutil.rmtree(SHARED_DIR)
-    except Exception as err:
-        logger.log(
-            "warning | remove shared dir & cid file | "
-            + str(err)
-            + " | "
-            + str(traceback.format_exc())
+        code = container.exec(
+            ["bash"] + command.split(" "),
+            workdir=CONTAINER_SUT_DIR,
+            stdout=out,
+            stderr=err,
+            timeout=timeout,
         )
+    finally:
+        out.close()
+        err.close()
+    if code is None:
+        logger.log(f"exec | {container.cid} | killed after {timeout}s | {command}")
 
-    return succ
+    logger.log(f"exec stdout ({out.tail.total} B) | " + out.tail.get_text())
+    logger.log(f"exec stderr ({err.tail.total} B) | " + err.tail.get_text())
+    return None if container.killed else code
+
+
+"""
+run tests of one solution in parallel (at most testing.parallel_tests at once in the same container)
+* every test is run by its own `docker exec` (run_tests.sh) with its own tag file,
+  because tst appends tags to TAG_FILE line by line
+* tag files of tests are merged to tests_tags.yaml and removed
+* testsuite.sh is not used in this mode (same as for running of selected tests)
+* timeout is for every test, container is killed if some test doesnt end in time
+* returns 0, exit code of the first failed test or None if tests were killed
+"""
 
 
-def clean_test(solution):
+def get_test_tags_file_name(test_name):
+    return f".{test_name}_{logger.TESTS_TAGS}"
+
+
+def run_tests_parallel_in_docker(
+    env, container, fut, tests, timeout=None, metrics=None
+):
+    def run_test(test_name):
+        if container.killed or env.is_exit_mode():
+            return None
+        tag_file = get_test_tags_file_name(test_name)
+        # run_tests tst_file tests_dir TESTS_TAGS RESULTS_DIR login fut test
+        command = f"{CONTAINER_RUN_FILE} /opt/tests/src/tst /opt/tests {tag_file} {logger.RESULTS_SUB_DIR} sut {fut} {test_name}"
+        start = time.perf_counter()
+        code = exec_in_docker(env, container, command, timeout, name=test_name)
+        if metrics is not None:
+            metrics.add_test(test_name, time.perf_counter() - start)
+        return code
+
+    jobs = env.testing_parallel_tests
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        codes = list(executor.map(run_test, tests))
+    if None in codes:
+        return None
+    failed = [code for code in codes if code != 0]
+    if failed:
+        return failed[0]
+
+    results_dir = container.workspace.results_dir
+    merged = {}
+    for test_name in tests:
+        tag_file = os.path.join(results_dir, get_test_tags_file_name(test_name))
+        if not os.path.exists(tag_file):
+            continue
+        tags = load_tags(tag_file)
+        if tags is not None and tags.data:
+            merged.update(tags.data)
+        os.remove(tag_file)
+    save_tags_to_file(Tags(os.path.join(results_dir, logger.TESTS_TAGS), merged))
+    return 0
+
+
+def get_tests_tags_file(solution):
+    return os.path.join(solution.path, logger.RESULTS_SUB_DIR, logger.TESTS_TAGS)
+
+
+# remove all test results of solution (or only results of given tests)
+def clean_test(solution, tests=None):
     try:
         student_results = os.path.join(solution.path, logger.RESULTS_SUB_DIR)
-        if os.path.exists(student_results):
+        if tests:
+            for test_name in tests:
+                test_results = os.path.join(student_results, test_name)
+                if os.path.exists(test_results):
+                    shutil.rmtree(test_results)
+        elif os.path.exists(student_results):
             shutil.rmtree(student_results)
-        if os.path.exists(SHARED_DIR):
-            shutil.rmtree(SHARED_DIR)
     except Exception as err:
         logger.log("clean test | " + str(err))
+    # fingerprint can be in tag store (it isnt removed with results dir)
+    clear_fingerprint(solution, tests=tests)
+
+
+# compiled sum equations {sum_file: (signature, equation)}
+sum_equations = {}
+
 
+def get_sum_equation_file(env):
+    return os.path.join(env.cwd.proj.path, logger.TESTS_DIR, logger.SUM_FILE)
 
-def calculate_score(env, solution):
+
+# returns compiled equation from sum file of project (compiled again only if file changes)
+def get_sum_equation(env):
+    sum_file = get_sum_equation_file(env)
+    signature = get_file_signature(sum_file)
+    cached = sum_equations.get(sum_file)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    equation = compile_sum_equation(load_sum_equation_from_file(env, sum_file))
+    sum_equations[sum_file] = (signature, equation)
+    return equation
+
+
+# tests = names of tests for SUM_ALL_TESTS (if None, they are found in proj tests dir)
+def calculate_score(env, solution, tests=None):
     if not env.cwd.proj or not solution:
         return None
 
     max_score = env.cwd.proj.max_score
     try:
-        # load sum file
-        tests_dir = os.path.join(env.cwd.proj.path, logger.TESTS_DIR)
-        sum_file = os.path.join(tests_dir, logger.SUM_FILE)
-        sum_equation_str = load_sum_equation_from_file(env, sum_file)
-
-        # parse sum equation
-        equation, ignored_tags = parse_sum_equation(env, solution, sum_equation_str)
-        equation = " ".join(str(x) for x in equation)
+        equation = get_sum_equation(env)
+        if tests is None and any(name == "SUM_ALL_TESTS" for _, name in equation):
+            tests = get_tests_names(env)
+        tokens, ignored_tags = evaluate_sum_equation(equation, solution, tests)
 
         # calculate sum
-        if equation != "":
-            result = eval(equation)
+        if tokens:
+            result = calculate_equation(tokens)
             score = max_score if result > max_score else result
             bonus = result - max_score if result > max_score else 0
             return (score, bonus)
@@ -352,8 +575,8 @@ def check_bash_functions_for_testing(proj_dir):
         bash_file_exists = True
     else:
         try:
-            if not os.path.exists(bash_dir):
-                os.mkdir(bash_dir)
+            # solutions can be tested in parallel, so the dir may already exist
+            os.makedirs(bash_dir, exist_ok=True)
             shutil.copyfile(SRC_BASH_FILE, bash_file)
             st = os.stat(bash_file)
             os.chmod(bash_file, st.st_mode | stat.S_IEXEC)
@@ -0,0 +1,64 @@
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+
+import spef.utils.logger as logger
+
+
+WORKSPACE_PREFIX = "spef_"
+
+# workspaces which were not cleaned yet (they are removed on exit)
+active_workspaces = set()
+active_workspaces_lock = threading.Lock()
+
+
+"""
+scratch workspace for one testsuite run
+* every run gets its own unique temporary directory (in system tmp dir, so runs
+  from more spef instances on the same host dont clobber each other)
+* workspace/shared/ is mounted to the docker container (CONTAINER_DIR)
+* workspace/shared/tests/ is only mount point for staged tests (see staging.py)
+* workspace/docker.cid is the cid file of container
+* workspace is removed when leaving `with` block (or on exit at the latest)
+"""
+
+
+class Workspace:
+    def __init__(self):
+        self.path = tempfile.mkdtemp(prefix=WORKSPACE_PREFIX)
+        self.shared_dir = os.path.join(self.path, "shared")
+        self.tests_dir = os.path.join(self.shared_dir, logger.TESTS_DIR)
+        self.sut_dir = os.path.join(self.shared_dir, logger.DOCKER_SUT_DIR)
+        self.run_file = os.path.join(self.shared_dir, logger.RUN_FILE)
+        self.results_dir = os.path.join(self.sut_dir, logger.RESULTS_SUB_DIR)
+        self.cid_file = os.path.join(self.path, "docker.cid")
+        with active_workspaces_lock:
+            active_workspaces.add(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.clean()
+        return False
+
+    def clean(self):
+        try:
+            if os.path.exists(self.path):
+                shutil.rmtree(self.path)
+        except Exception as err:
+            logger.log(f"clean workspace | {self.path} | {err}")
+        with active_workspaces_lock:
+            active_workspaces.discard(self)
+
+
+def clean_all_workspaces():
+    with active_workspaces_lock:
+        workspaces = list(active_workspaces)
+    for workspace in workspaces:
+        workspace.clean()
+
+
+atexit.register(clean_all_workspaces)
@@ -0,0 +1,282 @@
+import os
+import sqlite3
+import threading
+import time
+import traceback
+
+import spef.utils.logger as logger
+from spef.utils.content_scan import SNIFF_SIZE, is_binary
+from spef.utils.index import RACY_WINDOW, get_file_signature
+
+
+"""
+trigram index of project files for filter by content (optional, in proj conf: content_index: True)
+* index is sqlite db in project root (CONTENT_INDEX_FILE): signature (mtime_ns, size)
+  and trigrams of text of every file, key is path of file relative to project
+* filter gets candidates from index (files with all trigrams of searched text)
+  and only candidates are scanned, so result is the same as without index
+* filter doesnt wait for indexing, new files and files whose signature changed are scanned
+  and index is updated in background thread (one update at a time)
+* text is decoded the same way as in scan (invalid bytes are replaced, see content_scan.py),
+  files which cant be read and binary files never match, files bigger than MAX_INDEXED_SIZE,
+  recently modified files (see RACY_WINDOW) and files outside of project are always scanned
+"""
+
+MAX_INDEXED_SIZE = 8 * 1024 * 1024
+# indexed files are committed in batches (filter sees them before whole update ends)
+COMMIT_FILES = 100
+# page cache of sqlite (trigrams of file are inserted to whole b-tree)
+CACHE_SIZE_KB = 64 * 1024
+
+# state of file in index
+UNREADABLE = 0
+INDEXED = 1
+NOT_INDEXED = 2
+
+
+def get_trigrams(text):
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class ContentIndex:
+    def __init__(self, proj_path):
+        self.proj_path = os.path.abspath(proj_path)
+        self.path = os.path.join(self.proj_path, logger.CONTENT_INDEX_FILE)
+        self.lock = threading.Lock()  # connection
+        self.update_lock = threading.Lock()  # one update at a time
+        self.closed = False
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "id INTEGER PRIMARY KEY, path TEXT UNIQUE, mtime_ns INTEGER, size INTEGER, "
+            "state INTEGER NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS trigrams ("
+            "trigram TEXT, file_id INTEGER, PRIMARY KEY (trigram, file_id)) WITHOUT ROWID"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS trigrams_file ON trigrams (file_id)"
+        )
+        self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.conn.close()
+
+    # returns key of file in index (None if file cant be indexed)
+    def get_key(self, file_path):
+        file_path = os.path.abspath(file_path)
+        if file_path.startswith(self.path):
+            return None  # db of index (with its -wal and -shm files)
+        key = os.path.relpath(file_path, self.proj_path)
+        if key.split(os.sep)[0] == os.pardir:
+            return None
+        return key
+
+    def is_intern(self, file_path):
+        return os.path.abspath(file_path).startswith(self.path)
+
+    # returns (state, trigrams) of file (file is read without lock)
+    def read_file(self, file_path, signature):
+        state = NOT_INDEXED
+        trigrams = set()
+        if signature[1] <= MAX_INDEXED_SIZE:
+            try:
+                # same read as in filter (file which cant be read there never matches)
+                with open(file_path, "rb") as f:
+                    binary = is_binary(f.read(SNIFF_SIZE))
+                if binary:
+                    state = UNREADABLE
+                else:
+                    with open(file_path, "r", errors="replace") as f:
+                        trigrams = get_trigrams(f.read())
+                    state = INDEXED
+            except Exception:
+                state = UNREADABLE
+        return state, trigrams
+
+    # with lock
+    def save_file(self, file_id, key, signature, state, trigrams):
+        if file_id is None:
+            file_id = self.conn.execute(
+                "INSERT INTO files (path, mtime_ns, size, state) VALUES (?, ?, ?, ?)",
+                (key, *signature, state),
+            ).lastrowid
+        else:
+            self.conn.execute("DELETE FROM trigrams WHERE file_id = ?", (file_id,))
+            self.conn.execute(
+                "UPDATE files SET mtime_ns = ?, size = ?, state = ? WHERE id = ?",
+                (*signature, state, file_id),
+            )
+        self.conn.executemany(
+            "INSERT INTO trigrams (trigram, file_id) VALUES (?, ?)",
+            ((trigram, file_id) for trigram in sorted(trigrams)),
+        )
+        return file_id
+
+    # returns {key: (file_id, signature, state)} of all files in index
+    def get_rows(self):
+        with self.lock:
+            rows = {}
+            for file_id, key, mtime_ns, size, state in self.conn.execute(
+                "SELECT id, path, mtime_ns, size, state FROM files"
+            ):
+                rows[key] = (file_id, (mtime_ns, size), state)
+            return rows
+
+    """
+    returns (states, outdated) without indexing of files
+    * states = {file_path: (file_id, state)} for files which are up to date in index
+    * outdated = some files can be indexed (they are new or changed)
+    """
+
+    def get_states(self, files):
+        now = time.time_ns()
+        rows = self.get_rows()
+        states, outdated = {}, False
+        for file_path in files:
+            key = self.get_key(file_path)
+            if key is None:
+                continue
+            signature = get_file_signature(file_path)
+            if signature is None or now - signature[0] < RACY_WINDOW:
+                continue
+            row = rows.get(key)
+            if row is not None and row[1] == signature:
+                states[file_path] = (row[0], row[2])
+            else:
+                outdated = True
+        return states, outdated
+
+    """
+    indexes new and changed files
+    * returns {file_path: (file_id, state)} for files which are up to date in index
+    * files removed from project are removed from index
+    * files are read without lock, so index can be used by filter during update
+    """
+
+    def update(self, files):
+        with self.update_lock:
+            now = time.time_ns()
+            result = {}
+            rows = self.get_rows()
+            seen = set()
+            changed = 0
+            for file_path in files:
+                key = self.get_key(file_path)
+                if key is None:
+                    continue
+                seen.add(key)
+                signature = get_file_signature(file_path)
+                if signature is None or now - signature[0] < RACY_WINDOW:
+                    continue
+                row = rows.get(key)
+                if row is not None and row[1] == signature:
+                    result[file_path] = (row[0], row[2])
+                    continue
+                file_id = row[0] if row is not None else None
+                state, trigrams = self.read_file(file_path, signature)
+                with self.lock:
+                    if self.closed:
+                        return result
+                    file_id = self.save_file(file_id, key, signature, state, trigrams)
+                    changed += 1
+                    if changed % COMMIT_FILES == 0:
+                        self.conn.commit()
+                result[file_path] = (file_id, state)
+
+            with self.lock:
+                if self.closed:
+                    return result
+                for key in set(rows) - seen:
+                    if not os.path.exists(os.path.join(self.proj_path, key)):
+                        file_id = rows[key][0]
+                        self.conn.execute(
+                            "DELETE FROM trigrams WHERE file_id = ?", (file_id,)
+                        )
+                        self.conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+                self.conn.commit()
+            return result
+
+    # starts update in background thread (if other update is running, files are indexed next time)
+    def update_in_background(self, files):
+        if self.update_lock.locked():
+            return
+
+        def run():
+            try:
+                self.update(files)
+            except Exception as err:
+                logger.log(
+                    "update content index | "
+                    + str(err)
+                    + " | "
+                    + traceback.format_exc()
+                )
+
+        threading.Thread(target=run, name="content-index", daemon=True).start()
+
+    # returns ids of indexed files which contain all trigrams (None = all files)
+    def get_files_with_trigrams(self, trigrams):
+        if not trigrams:
+            return None
+        query = " INTERSECT ".join(
+            ["SELECT file_id FROM trigrams WHERE trigram = ?"] * len(trigrams)
+        )
+        with self.lock:
+            return {row[0] for row in self.conn.execute(query, tuple(trigrams))}
+
+    # returns files which can contain content (they have to be scanned to be sure)
+    def get_candidates(self, files, content):
+        files = list(files)
+        states, outdated = self.get_states(files)
+        if outdated:
+            self.update_in_background(files)
+        file_ids = self.get_files_with_trigrams(get_trigrams(content))
+        candidates = []
+        for file_path in files:
+            if self.is_intern(file_path):
+                continue
+            entry = states.get(file_path)
+            if entry is None:
+                # not in index or changed
+                candidates.append(file_path)
+                continue
+            file_id, state = entry
+            if state == NOT_INDEXED or (
+                state == INDEXED and (file_ids is None or file_id in file_ids)
+            ):
+                candidates.append(file_path)
+        return candidates
+
+
+content_indexes = {}  # {proj_path: ContentIndex}
+content_indexes_lock = threading.Lock()
+
+
+# opens content index of project (once), returns None if it cant be opened
+def open_content_index(proj_path):
+    key = os.path.abspath(proj_path)
+    with content_indexes_lock:
+        if key not in content_indexes:
+            try:
+                content_indexes[key] = ContentIndex(proj_path)
+            except Exception as err:
+                logger.log(
+                    "open content index | " + str(err) + " | " + traceback.format_exc()
+                )
+                return None
+        return content_indexes[key]
+
+
+def close_content_indexes():
+    with content_indexes_lock:
+        indexes = list(content_indexes.values())
+        content_indexes.clear()
+    for index in indexes:
+        index.close()
@@ -0,0 +1,78 @@
+import concurrent.futures
+import io
+import os
+
+
+"""
+scanning of files for filter by content
+* files are scanned in thread pool (reading of files waits for disks, not for python)
+* file is read in chunks (memory doesnt depend on size of file) and reading stops at first match
+* binary files (with null byte in first block) are skipped
+* invalid bytes are decoded as replacement character (U+FFFD), so text before and after them
+  can match wherever it is in the file (the same decoding is used by content index)
+"""
+
+CHUNK_SIZE = 1024 * 1024  # chars
+SNIFF_SIZE = 8192  # bytes
+SCAN_JOBS = min(32, (os.cpu_count() or 1) + 4)
+BATCHES_PER_JOB = 4
+
+
+def is_binary(head):
+    return b"\0" in head
+
+
+def file_contains(file_path, content):
+    with open(file_path, "rb") as f:
+        if is_binary(f.read(SNIFF_SIZE)):
+            return False
+        f.seek(0)
+        # same decoding and newlines as open(file_path, "r", errors="replace")
+        text = io.TextIOWrapper(f, errors="replace")
+        # end of previous chunk (content can be split between chunks)
+        overlap = len(content) - 1
+        tail = ""
+        while True:
+            chunk = text.read(CHUNK_SIZE)
+            if not chunk:
+                return not content  # empty file contains only empty content
+            chunk = tail + chunk
+            if content in chunk:
+                return True
+            tail = chunk[-overlap:] if overlap > 0 else ""
+
+
+"""
+returns (matches, errors) for files
+* matches = files which contain content
+* errors = [(file_path, exception)] for files which couldnt be read
+"""
+
+
+def scan_files(files, content, jobs=None):
+    def scan(batch):
+        results = []
+        for file_path in batch:
+            try:
+                results.append((file_path, file_contains(file_path, content), None))
+            except Exception as err:
+                results.append((file_path, False, err))
+        return results
+
+    jobs = jobs or SCAN_JOBS
+    if jobs > 1 and len(files) > 1:
+        # files are scanned in batches (one task per file is too slow for small files)
+        size = max(1, len(files) // (jobs * BATCHES_PER_JOB))
+        batches = [files[i : i + size] for i in range(0, len(files), size)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = [item for batch in executor.map(scan, batches) for item in batch]
+    else:
+        results = scan(files)
+
+    matches, errors = [], []
+    for file_path, found, err in results:
+        if err is not None:
+            errors.append((file_path, err))
+        elif found:
+            matches.append(file_path)
+    return matches, errors
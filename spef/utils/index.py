@@ -0,0 +1,144 @@
+import os
+import pickle
+import tempfile
+import threading
+import time
+import traceback
+
+import spef.utils.logger as logger
+
+
+# version of index format (index with other version is ignored)
+INDEX_VERSION = 2
+
+# files modified less than this ago (in ns) are not stored in index,
+# their next modification could keep the same mtime and size
+RACY_WINDOW = 2 * 10**9
+
+
+"""
+on-disk index of project (loaded data of solution files)
+* one pickle file in project root (PROJECT_INDEX_FILE): {file_path: (signature, data)}
+* signature = (mtime_ns, size) of file, data = pickled result of loader for that file
+  (every get returns new object, so changes of returned data dont affect index)
+* index is loaded in one read (and kept in memory for next loads of the same project),
+  every file is revalidated by stat when it is requested
+  and it is loaded (parsed) again only if its signature was changed
+* missing files are not cached (loader decides what to return for them)
+* entries of removed solutions are pruned when solutions are loaded
+"""
+
+
+def get_index_file(proj_path):
+    return os.path.join(os.path.abspath(proj_path), logger.PROJECT_INDEX_FILE)
+
+
+def get_file_signature(path):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+class ProjectIndex:
+    def __init__(self, proj_path):
+        self.proj_path = os.path.abspath(proj_path)
+        self.path = get_index_file(proj_path)
+        self.entries = {}  # {file_path: (signature, data)}
+        self.changed = False
+        self.lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = pickle.load(f)
+            if data["version"] == INDEX_VERSION and data["proj"] == self.proj_path:
+                self.entries = data["entries"]
+        except FileNotFoundError:
+            pass
+        except Exception as err:
+            logger.log(f"load project index | {self.path} | {err}")
+        return self
+
+    # returns data of file from index if file wasnt changed, otherwise load_data()
+    def get(self, file_path, load_data, signature=None):
+        if signature is None:
+            signature = get_file_signature(file_path)
+        if signature is None:
+            return load_data()
+        entry = self.entries.get(file_path)
+        if entry is not None and entry[0] == signature:
+            return pickle.loads(entry[1])
+        data = load_data()
+        dumped = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.entries[file_path] = (signature, dumped)
+            self.changed = True
+        return data
+
+    def contains(self, file_path, signature):
+        entry = self.entries.get(file_path)
+        return entry is not None and entry[0] == signature
+
+    # adds already pickled data of file
+    def put(self, file_path, signature, dumped):
+        if signature is None:
+            return
+        with self.lock:
+            self.entries[file_path] = (signature, dumped)
+            self.changed = True
+
+    # removes entries of files which are not in any of given dirs
+    def prune(self, dirs):
+        prefixes = tuple(os.path.join(d, "") for d in dirs)
+        with self.lock:
+            removed = [p for p in self.entries if not p.startswith(prefixes)]
+            for path in removed:
+                del self.entries[path]
+            self.changed = self.changed or bool(removed)
+
+    def save(self):
+        with self.lock:
+            if not self.changed:
+                return
+            now = time.time_ns()
+            entries = {
+                path: entry
+                for path, entry in self.entries.items()
+                if now - entry[0][0] > RACY_WINDOW
+            }
+            self.changed = False
+        data = {"version": INDEX_VERSION, "proj": self.proj_path, "entries": entries}
+        try:
+            # write to tmp file and replace, so index is never read half-written
+            fd, tmp_path = tempfile.mkstemp(
+                dir=self.proj_path, prefix=logger.PROJECT_INDEX_FILE, suffix=".tmp"
+            )
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+        except Exception as err:
+            logger.log(
+                "save project index | " + str(err) + " | " + traceback.format_exc()
+            )
+
+
+project_indexes = {}
+project_indexes_lock = threading.Lock()
+
+
+# returns index of project (loaded from file only once)
+def get_project_index(proj_path):
+    key = os.path.abspath(proj_path)
+    with project_indexes_lock:
+        if key not in project_indexes:
+            project_indexes[key] = ProjectIndex(proj_path).load()
+        return project_indexes[key]
+
+
+def save_project_indexes():
+    with project_indexes_lock:
+        indexes = list(project_indexes.values())
+    for index in indexes:
+        index.save()
@@ -7,6 +7,8 @@ from spef.modules.buffer import Buffer
 from spef.modules.report import Report, Note
 from spef.modules.tags import Tags
 import spef.utils.logger as logger
+from spef.utils.serialization import load_yaml, dump_yaml
+from spef.utils.tag_store import get_tag_store
 from spef.utils.match import (
     get_proj_path,
     get_root_solution_dir,
@@ -24,7 +26,7 @@ def load_config_from_file():
     conf_file = os.path.join(src_dir, logger.CONFIG_FILE)
     try:
         with open(conf_file, "r") as f:
-            config = yaml.safe_load(f)
+            config = load_yaml(f)
         return config
     except Exception as err:
         logger.log(
@@ -42,7 +44,7 @@ def load_control_from_file():
     control_file = os.path.join(src_dir, logger.CONTROL_FILE)
     try:
         with open(control_file, "r") as f:
-            control = yaml.safe_load(f)
+            control = load_yaml(f)
         return control
     except Exception as err:
         logger.log(
@@ -62,7 +64,7 @@ def load_proj_from_conf_file(path):
     project_file = os.path.join(path, logger.PROJ_CONF_FILE)
     try:
         with open(project_file, "r") as f:
-            data = yaml.safe_load(f)
+            data = load_yaml(f)
         return data
     except Exception as err:
         logger.log(
@@ -78,7 +80,7 @@ def save_proj_to_conf_file(path, data):
     project_file = os.path.join(path, logger.PROJ_CONF_FILE)
     try:
         with open(project_file, "w+", encoding="utf8") as f:
-            yaml.dump(
+            dump_yaml(
                 data, f, default_flow_style=False, allow_unicode=True, sort_keys=False
             )
     except Exception as err:
@@ -158,10 +160,11 @@ def save_user_notes_for_solution(solution):
     report_dir = os.path.join(solution.path, logger.REPORT_DIR)
     user_notes_file = os.path.join(report_dir, logger.USER_NOTES_FILE)
     try:
+        # notes are taken before the file is truncated (solution reloads changed files)
+        lines = "\n".join(solution.user_notes)
         if not os.path.exists(report_dir) or not os.path.isdir(report_dir):
             os.mkdir(report_dir)
         with open(user_notes_file, "w+") as f:
-            lines = "\n".join(solution.user_notes)
             f.write(lines)
     except Exception as err:
         logger.log(
@@ -181,7 +184,7 @@ def load_test_notes_for_solution(solution_dir):
     )
     if os.path.exists(test_notes_file):
         with open(test_notes_file, "r") as f:
-            data = yaml.safe_load(f)
+            data = load_yaml(f)
             return data
     return {}
 
@@ -190,12 +193,11 @@ def save_test_notes_for_solution(solution):
     report_dir = os.path.join(solution.path, logger.REPORT_DIR)
     test_notes_file = os.path.join(report_dir, logger.TEST_NOTES_FILE)
     try:
+        test_notes = solution.test_notes
         if not os.path.exists(report_dir) or not os.path.isdir(report_dir):
             os.mkdir(report_dir)
         with open(test_notes_file, "w+") as f:
-            yaml.dump(
-                solution.test_notes, f, default_flow_style=False, allow_unicode=True
-            )
+            dump_yaml(test_notes, f, default_flow_style=False, allow_unicode=True)
     except Exception as err:
         logger.log(
             "save test notes for solution | "
@@ -222,7 +224,7 @@ def load_report_from_file(path, add_suffix=True, orig_file_name=None):
             if first_line.startswith("#"):
                 orig_file_name = first_line[1:]
         with open(report_file, "r") as f:
-            data = yaml.safe_load(f)
+            data = load_yaml(f)
         notes = []
         """ parse notes from directory to list of Note objects """
         for row in data:
@@ -263,7 +265,7 @@ def save_report_to_file(report):
             if report.orig_file_name is not None:
                 f.write(f"#{report.orig_file_name}\n")
         with open(report.path, "a", encoding="utf8") as f:
-            yaml.dump(notes, f, default_flow_style=False, allow_unicode=True)
+            dump_yaml(notes, f, default_flow_style=False, allow_unicode=True)
         report.last_save = report.data.copy()
     except Exception as err:
         logger.log(
@@ -298,6 +300,16 @@ def load_testsuite_tags(proj_tests_dir):
         return None
 
 
+# returns version of testsuite (from testsuite_tags.yaml) or None
+def load_testsuite_version(proj_tests_dir):
+    tests_tags = load_testsuite_tags(proj_tests_dir)
+    if tests_tags is not None and len(tests_tags) > 0:
+        version_args = tests_tags.get_args_for_tag("version")
+        if version_args:
+            return list(version_args)[0]
+    return None
+
+
 def load_testcase_tags(proj_testcase_dir):
     if os.path.exists(proj_testcase_dir):
         tags_file = os.path.join(proj_testcase_dir, logger.TESTCASE_TAGS)
@@ -311,8 +323,12 @@ def load_tags(tags_file):
         return None
     tags = None
     try:
-        with open(tags_file, "r+") as f:
-            data = yaml.safe_load(f)
+        store = get_tag_store(tags_file)
+        if store is not None:
+            data = store.load(tags_file)
+        else:
+            with open(tags_file, "r+") as f:
+                data = load_yaml(f)
         tags = Tags(tags_file, data)
     except yaml.YAMLError as err:
         tags = Tags(tags_file, {})
@@ -375,13 +391,30 @@ def get_tags_file(path, proj=None):
 
 def save_tags_to_file(tags):
     if tags is not None:
+        store = get_tag_store(tags.path)
+        if store is not None:
+            store.save(tags.path, tags.data)
+            return
         with open(tags.path, "w+", encoding="utf8") as f:
-            yaml.dump(tags.data, f, default_flow_style=False, allow_unicode=True)
+            dump_yaml(tags.data, f, default_flow_style=False, allow_unicode=True)
+
+
+# removes tags file (from tag store or yaml file)
+def remove_tags_file(tags_file):
+    store = get_tag_store(tags_file)
+    if store is not None:
+        store.remove(tags_file)
+    if os.path.exists(tags_file):
+        os.remove(tags_file)
 
 
 def add_tag_to_file(file_path, tags_dir):
+    store = get_tag_store(file_path)
+    if store is not None:
+        store.add(file_path, tags_dir)
+        return
     with open(file_path, "a+", encoding="utf8") as f:
-        yaml.dump(tags_dir, f, default_flow_style=False, allow_unicode=True)
+        dump_yaml(tags_dir, f, default_flow_style=False, allow_unicode=True)
 
 
 """ **************** BUFFER AND TAGS **************** """
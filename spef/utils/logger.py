@@ -23,6 +23,11 @@ TYPICAL_NOTES_FILE = "typical_notes.txt"
 
 # proj/
 PROJ_CONF_FILE = "proj_conf.yaml"
+TAG_STORE_FILE = "tags.db"  # only if project uses tag store (tag_store: sqlite)
+CONTENT_INDEX_FILE = "content_index.db"  # only if project uses content index
+PROJECT_INDEX_FILE = "project_index.pickle"  # cached data of solution files
+# hidden with other cached files in browsing (prefix, db files have -wal and -shm files)
+CACHE_FILES = (TAG_STORE_FILE, CONTENT_INDEX_FILE, PROJECT_INDEX_FILE)
 REPORT_DIR = "reports"
 TESTS_DIR = "tests"
 HISTORY_DIR = "history"
@@ -31,6 +36,8 @@ HISTORY_DIR = "history"
 REPORT_TEMPLATE = "report_template.j2"
 SCORING_STATS_FILE = "scoring_stats"
 TESTS_STATS_FILE = "tests_stats"
+TESTING_METRICS_FILE = "testing_metrics.jsonl"
+TESTING_METRICS_STATS_FILE = "testing_metrics_stats"
 
 
 # proj/HISTORY_DIR/
@@ -49,6 +56,7 @@ SOLUTION_TAGS = "solution" + TAGS_SUFFIX
 
 # proj/solution/TESTS_DIR/
 TESTS_TAGS = "tests" + TAGS_SUFFIX
+TEST_TIMES_FILE = ".test_times"  # written by tst: "test_name start end"
 
 # proj/solution/REPORT_DIR/
 CODE_REVIEW_FILE = "code_review"
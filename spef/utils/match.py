@@ -412,15 +412,9 @@ def get_solution_archives(env):
 
 # return list of test dirs (dirs from project_dir/tests_dir/*)
 # with_check=True means it returns only valid test dirs (with 'dotest.sh' file in it)
+# names of tests are cached in project (see Project.get_tests_names)
 def get_tests_names(env, with_check=True):
-    result_names = set()
-    if env.cwd.proj is not None:
-        tests_dir = os.path.join(env.cwd.proj.path, logger.TESTS_DIR)
-        items = os.listdir(tests_dir)  # list all dirs and files in tests dir
-        for item in items:
-            path = os.path.join(tests_dir, item)
-            if is_testcase_dir(path, with_check=with_check):
-                result_names.add(item)
-    else:
+    if env.cwd.proj is None:
         logger.log("get tests names | cwd is not project root directory")
-    return list(result_names)
+        return []
+    return env.cwd.proj.get_tests_names(with_check=with_check)
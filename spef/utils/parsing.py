@@ -3,70 +3,69 @@ import re
 
 import spef.utils.coloring as clr
 from spef.utils.logger import log
-from spef.utils.match import get_tests_names
 
 
-def parse_sum_equation(env, solution, sum_equation_str):
+"""
+sum equation (line SUM=... in proj/tests/sum) is compiled once to list of terms
+* term = (op, name), op is None for the first term, name is SUM_ALL_TESTS or scoring tag name
+* evaluation for solution is only lookup of its tags (without parsing and eval)
+"""
+
+
+def compile_sum_equation(sum_equation_str):
     equation = []
-    ignored_tags = []
-    first_term_is_none = False
     if sum_equation_str is not None:
-        # sum_equation_str = ''.join(sum_equation_str)
         sum_equation_str = sum_equation_str.strip()
         if sum_equation_str.startswith("SUM="):
             sum_equation_str = sum_equation_str[4:]
             sum_equation_str = sum_equation_str.strip()
             if re.match(r"^\w+(\s*[\+\-\*]\s*\w+)*$", sum_equation_str):
                 components = re.split(r"([\+\-\*])", sum_equation_str)
-
-                if len(components) > 0:
-                    term = components.pop(0)
-                    term, ignored = parse_equation_term(env, solution, term)
-                    ignored_tags.extend(ignored)
-                    if term is not None:
-                        equation.append(str(term))
-                    else:
-                        first_term_is_none = True
-                else:
-                    log("empty SUM equation")
-                    return equation
-
+                equation.append((None, get_equation_term_name(components.pop(0))))
                 while len(components) >= 2:
-                    op = components.pop(0)
-                    term = components.pop(0)
-
-                    op = parse_equation_operand(op)
-                    term, ignored = parse_equation_term(env, solution, term)
-                    ignored_tags.extend(ignored)
-                    if op is not None and term is not None:
-                        equation.append(op)
-                        equation.append(str(term))
-                    else:
-                        equation.append("")
-                        equation.append("")
+                    op = parse_equation_operand(components.pop(0))
+                    equation.append((op, get_equation_term_name(components.pop(0))))
             else:
                 log("invalid SUM equation - doesnt match regex for equation")
         else:
             log("invalid SUM equation - doesnt start with 'SUM=' prefix ")
-        if first_term_is_none and len(equation) > 0:
-            equation = equation[1:]
-    return equation, ignored_tags
+    return equation
 
 
-def parse_equation_term(env, solution, term):
+def get_equation_term_name(term):
     term = str(term).strip()
-    if term == "SUM_ALL_TESTS":
-        # get all valid tests
-        tests = get_tests_names(env)
+    if term == "SUM_ALL_TESTS" or term.startswith("scoring_"):
+        return term
+    # add default 'scoring_' prefix
+    return f"scoring_{term}"
+
+
+# returns function which finds args of tag in solution tags or tests tags
+def get_solution_tags_lookup(solution):
+    tags_list = []
+    for tags in (solution.tags, solution.test_tags):
+        if tags is not None and len(tags) > 0:
+            tags_list.append(tags)
+
+    def lookup(tag_name):
+        for tags in tags_list:
+            args = tags.get_args_for_tag(tag_name)
+            if args is not None:
+                return list(args)
+        return None
+
+    return lookup
+
 
-        # for all test try to find its scoring tag in solution tags and tests tags
+def get_equation_term_value(lookup, name, tests):
+    if name == "SUM_ALL_TESTS":
+        # for all valid tests try to find its scoring tag in solution tags and tests tags
         result = 0
         skipped_tags = []
         for test in tests:
             tag_name = f"scoring_{test}"
-            tag_args = find_tag_for_solution(solution, tag_name)
+            tag_args = lookup(tag_name)
             if tag_args is not None and len(tag_args) > 0:
-                # for valid tests with scoring tag add its scoring value to equation with '+'
                 value = str(tag_args[0]).strip()
                 try:
                     result = result + int(value)
@@ -78,23 +77,83 @@ def parse_equation_term(env, solution, term):
                 skipped_tags.append(tag_name)
         return result, skipped_tags
     else:
-        tag_name = term
-        if not term.startswith("scoring_"):
-            # add default 'scoring_' prefix
-            tag_name = f"scoring_{tag_name}"
-
-        # try to find tag with scoring_ prefix in solution tags and tests tags
-        tag_args = find_tag_for_solution(solution, tag_name)
+        tag_args = lookup(name)
         if tag_args is not None and len(tag_args) > 0:
             value = str(tag_args[0]).strip()
             try:
-                result = int(value)
-                return result, []
+                return int(value), []
             except ValueError:
-                log(f"firs param of tag '{tag_name}' is not a number")
-                return None, [tag_name]
+                log(f"firs param of tag '{name}' is not a number")
+                return None, [name]
         else:
-            return None, [tag_name]
+            return None, [name]
+
+
+"""
+returns (tokens, ignored_tags) of equation for solution
+* tokens = values (int) and operands, terms without value are skipped with their operand
+* if the first term has no value, operand of the next term is dropped
+"""
+
+
+def evaluate_sum_equation(equation, solution, tests):
+    lookup = get_solution_tags_lookup(solution)
+    tokens, ignored_tags = [], []
+    first_term_is_none = False
+    for op, name in equation:
+        value, ignored = get_equation_term_value(lookup, name, tests)
+        ignored_tags.extend(ignored)
+        if op is None:
+            if value is not None:
+                tokens.append(value)
+            else:
+                first_term_is_none = True
+        elif value is not None:
+            tokens.extend([op, value])
+        else:
+            tokens.extend(["", ""])
+    if first_term_is_none and len(tokens) > 0:
+        tokens = tokens[1:]
+    return [token for token in tokens if token != ""], ignored_tags
+
+
+# calculates tokens of equation (* before + and -, unary + and -), raises ValueError if invalid
+def calculate_equation(tokens):
+    pos = 0
+
+    def unary():
+        nonlocal pos
+        if pos >= len(tokens):
+            raise ValueError("unexpected end of equation")
+        token = tokens[pos]
+        pos += 1
+        if token == "+":
+            return unary()
+        elif token == "-":
+            return -unary()
+        elif isinstance(token, int):
+            return token
+        raise ValueError(f"unexpected '{token}' in equation")
+
+    def product():
+        nonlocal pos
+        result = unary()
+        while pos < len(tokens) and tokens[pos] == "*":
+            pos += 1
+            result = result * unary()
+        return result
+
+    result = product()
+    while pos < len(tokens):
+        op = tokens[pos]
+        pos += 1
+        if op == "+":
+            result = result + product()
+        elif op == "-":
+            result = result - product()
+        else:
+            raise ValueError(f"unexpected '{op}' in equation")
+    return result
 
 
 def parse_equation_operand(op):
@@ -350,21 +409,3 @@ def find_tag_param_for_solution(solution, tag_name, param_idx, info_for_tests=Fa
         if param is not None:
             return param
     return None
-
-
-def find_tag_for_solution(solution, tag_name):
-    args = None
-    # try to find required tag in solution tags
-    solution_tags = solution.tags
-    if solution_tags is not None and len(solution_tags) > 0:
-        args = solution_tags.get_args_for_tag(tag_name)
-        if args is not None:
-            return list(args)
-
-    # try to find required tag in tests tags
-    tests_tags = solution.test_tags
-    if tests_tags is not None and len(tests_tags) > 0:
-        args = tests_tags.get_args_for_tag(tag_name)
-        if args is not None:
-            return list(args)
-    return args
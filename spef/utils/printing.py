@@ -78,6 +78,9 @@ def print_hint(env):
     help_dict = env.control.get_hint_for_mode(env)
     if help_dict is not None:
         string = ""
+        # progress of testing running in background
+        if env.testing_job is not None:
+            string = " | [" + env.testing_job.get_status() + "]"
         for key in help_dict:
             hint = " | " + str(key) + ":" + str(help_dict[key])
             if len(string) + len(hint) <= size[1]:
@@ -409,10 +412,8 @@ def show_directory_content(env):
                 txt = str(dir_name[: max_cols - 2]) + "/"
                 screen.addstr(i, 1, txt, coloring | curses.A_BOLD)
 
-                if env.show_solution_info and cwd.dirs_info:
-                    infos = None
-                    if dir_name in cwd.dirs_info:
-                        infos = cwd.dirs_info[dir_name]
+                if env.show_solution_info:
+                    infos = cwd.get_dir_info(env, dir_name)
 
                     if infos:
                         space = 2  # visual space between dir name and its info
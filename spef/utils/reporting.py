@@ -3,7 +3,7 @@ import os
 import traceback
 
 from spef.modules.project import Project
-from spef.testing.tst import calculate_score
+from spef.testing.metrics import load_metrics
 import spef.utils.logger as logger
 from spef.utils.loading import (
     load_proj_from_conf_file,
@@ -12,6 +12,7 @@ from spef.utils.loading import (
     save_test_notes_for_solution,
 )
 from spef.utils.match import match_regex, get_parent_regex_match, get_tests_names
+from spef.utils.score_matrix import get_score_matrix
 
 
 """ from subjA/proj1/xlogin00/dir/file_name to proj1/xlogin00/dir/file_name """
@@ -159,30 +160,13 @@ def generate_scoring_stats(env):
     nonzero_scored_solutions = 0
 
     try:
-        scoring_severity = {}
-        for key, solution in env.cwd.proj.solutions.items():
-            # get score for solution
-            total_score = None
-            if solution.tags is not None and len(solution.tags) > 0:
-                score_args = solution.tags.get_args_for_tag("score")
-                if score_args is not None and len(score_args) > 0:
-                    total_score = int(score_args[0])
-                else:
-                    scoring = calculate_score(env, solution)
-                    if scoring is not None:
-                        total_score, bonus_score = scoring
-
-            # for each score, calculate its severity
-            if total_score is not None:
-                score = int(total_score)
-                sum_score += score
-                scored_solutions += 1
-                if score > 0:
-                    nonzero_scored_solutions += 1
-                if score in scoring_severity:
-                    scoring_severity[score] += 1
-                else:
-                    scoring_severity[score] = 1
+        matrix = get_score_matrix(env, get_tests_names(env))
+        scoring_severity = matrix.get_total_histogram()
+        for score, count in scoring_severity.items():
+            sum_score += score * count
+            scored_solutions += count
+            if score > 0:
+                nonzero_scored_solutions += count
 
         for i in range(0, env.cwd.proj.max_score + 1):
             if not i in scoring_severity:
@@ -238,32 +222,18 @@ def generate_test_results_hist(env):
     if env.cwd.proj is None:
         return
 
-    max_score = env.cwd.proj.max_score
     score_nums = set()
     tests_stats = {}  # {'test_name': {'0': x%, '1': x,...}, 'test_name': {...},...}
     total_score_stats = {}  # {'score'}
     try:
-        ################### TESTS STATS ###################
         tests = get_tests_names(env)
+        matrix = get_score_matrix(env, tests)
+        ################### TESTS STATS ###################
         for test_name in tests:
-            test_scoring_severity = {}
-            tested_solutions = 0
-            # find scoring of this test for each solution
-            for key, solution in env.cwd.proj.solutions.items():
-                # get test result scoring for solution
-                test_score = None
-                if solution.test_tags is not None and len(solution.test_tags) > 0:
-                    score_args = solution.test_tags.get_args_for_tag(
-                        f"scoring_{test_name}"
-                    )
-                    if score_args is not None and len(score_args) > 0:
-                        test_score = int(score_args[0])
-                        tested_solutions += 1
-                        score_nums.add(test_score)
-                        if test_score in test_scoring_severity:
-                            test_scoring_severity[test_score] += 1
-                        else:
-                            test_scoring_severity[test_score] = 1
+            # scoring of this test for each solution
+            test_scoring_severity = matrix.get_test_histogram(test_name)
+            tested_solutions = sum(test_scoring_severity.values())
+            score_nums.update(test_scoring_severity)
 
             # parse scoring severity to percentage
             test_scoring_percentage = {}
@@ -275,25 +245,8 @@ def generate_test_results_hist(env):
             tests_stats[test_name] = test_scoring_percentage
 
         ################### TOTAL SCORE STATS ###################
-        # get total score for solution
-        scored_solutions = 0
-        total_score_severity = {}
-        for key, solution in env.cwd.proj.solutions.items():
-            score_sum = None
-            if solution.tags is not None and len(solution.tags) > 0:
-                score_args = solution.tags.get_args_for_tag("score")
-                if score_args is not None and len(score_args) > 0:
-                    score_sum = int(score_args[0])
-                else:
-                    scoring = calculate_score(env, solution)
-                    if scoring is not None:
-                        score_sum, bonus_score = scoring
-            if score_sum is not None:
-                scored_solutions += 1
-                if score_sum in total_score_severity:
-                    total_score_severity[score_sum] += 1
-                else:
-                    total_score_severity[score_sum] = 1
+        total_score_severity = matrix.get_total_histogram()
+        scored_solutions = sum(total_score_severity.values())
 
         # parse total score to percentage
         for score, severity in total_score_severity.items():
@@ -355,3 +308,93 @@ Total score |{sum_res}
             f.write(statistics)
     except Exception as err:
         logger.log(f"generate stats | {err} | {traceback.format_exc()}")
+
+
+"""
+casy testovania (z proj/reports/testing_metrics.jsonl)
+* trvanie jednotlivych faz testovania, najpomalsie testy, hosty a riesenia
+"""
+
+METRICS_PHASES = [
+    "clean",
+    "docker_run",
+    "prepare_data",
+    "wait",
+    "docker_exec",
+    "copy_back",
+    "score",
+]
+
+
+def generate_testing_metrics_stats(env, max_rows=15):
+    if env.cwd.proj is None:
+        return
+
+    try:
+        records = load_metrics(env.cwd.proj.path)
+
+        # {phase: [durations]}, {test: [durations]}, {host: [totals]}, {solution: total}
+        phases, tests, hosts, solutions = {}, {}, {}, {}
+        failed = 0
+        for record in records:
+            if not record.get("success"):
+                failed += 1
+            for phase, duration in record.get("phases", {}).items():
+                phases.setdefault(phase, []).append(duration)
+            for test_name, duration in record.get("tests", {}).items():
+                tests.setdefault(test_name, []).append(duration)
+            hosts.setdefault(record.get("host"), []).append(record.get("total", 0))
+            solutions[record.get("solution")] = record.get("total", 0)  # last run
+
+        phase_names = [p for p in METRICS_PHASES if p in phases]
+        phase_names += sorted(p for p in phases if p not in METRICS_PHASES)
+        phases_res = ""
+        for phase in phase_names:
+            durations = phases[phase]
+            phases_res += f"{phase:<14}|{sum(durations):>11.3f} |{sum(durations) / len(durations):>9.3f}\n"
+
+        slowest_tests = sorted(
+            tests.items(), key=lambda t: sum(t[1]) / len(t[1]), reverse=True
+        )[:max_rows]
+        name_len = max([len("Test name")] + [len(str(t)) for t, _ in slowest_tests])
+        tests_res = ""
+        for test_name, durations in slowest_tests:
+            avg = sum(durations) / len(durations)
+            tests_res += f"{test_name:<{name_len}} |{len(durations):>5} |{avg:>9.3f} |{max(durations):>9.3f}\n"
+
+        hosts_res = ""
+        for host, totals in sorted(hosts.items(), key=lambda h: str(h[0])):
+            hosts_res += (
+                f"{host} | {len(totals)} runs | avg {sum(totals) / len(totals):.3f}s\n"
+            )
+
+        slowest_solutions = sorted(solutions.items(), key=lambda s: s[1], reverse=True)[
+            :max_rows
+        ]
+        solutions_res = ""
+        for solution_name, total in slowest_solutions:
+            solutions_res += f"{solution_name} | {total:.3f}s\n"
+
+        line = "-" * 36
+        statistics = f"""\
+Testing runs: {len(records)} (solutions: {len(solutions)}, failed: {failed})
+{line}
+Phase         |  total [s] |  avg [s]
+{phases_res}{line}
+Slowest tests:
+{'Test name':<{name_len}} | runs |  avg [s] |  max [s]
+{tests_res}{line}
+Hosts:
+{hosts_res}{line}
+Slowest solutions (last run):
+{solutions_res}"""
+        # save stats to file
+        report_dir = os.path.join(env.cwd.proj.path, logger.REPORT_DIR)
+        if not os.path.exists(report_dir) or not os.path.isdir(report_dir):
+            os.makedirs(report_dir)
+
+        stats_file = os.path.join(report_dir, logger.TESTING_METRICS_STATS_FILE)
+        with open(stats_file, "w+") as f:
+            f.write(statistics)
+    except Exception as err:
+        logger.log(f"generate stats | {err} | {traceback.format_exc()}")
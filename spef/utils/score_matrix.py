@@ -0,0 +1,156 @@
+import re
+from array import array
+
+import spef.utils.logger as logger
+from spef.testing.tst import calculate_score, get_sum_equation_file
+from spef.utils.index import get_file_signature
+
+
+"""
+score matrix of project (solutions x tests) for project-wide statistics
+* one pass over all solutions: scoring of each test (scoring_{test} from tests tags)
+  and total score (score tag, or score calculated from sum equation)
+* values are in flat arrays of ints, missing value is MISSING
+* matrix is cached for project and built again only if tags of some solution,
+  tests or sum equation change (its shared by scoring stats and tests histogram)
+"""
+
+MISSING = -(2**63)
+SCORING_PREFIX = "scoring_"
+
+
+class ScoreMatrix:
+    def __init__(self, solutions, tests):
+        self.solutions = solutions  # [solution_name]
+        self.tests = tests  # [test_name]
+        self.columns = {test: i for i, test in enumerate(tests)}
+        self.test_scores = array("q", [MISSING]) * (len(solutions) * len(tests))
+        self.total_scores = array("q", [MISSING]) * len(solutions)
+
+    def set_test_score(self, row, test, score):
+        self.test_scores[row * len(self.tests) + self.columns[test]] = score
+
+    def get_test_scores(self, test):
+        column = self.columns[test]
+        scores = self.test_scores[column :: len(self.tests)]
+        return [score for score in scores if score != MISSING]
+
+    def get_total_scores(self):
+        return [score for score in self.total_scores if score != MISSING]
+
+    # returns {score: number of solutions}
+    def get_test_histogram(self, test):
+        return count_values(self.get_test_scores(test))
+
+    def get_total_histogram(self):
+        return count_values(self.get_total_scores())
+
+
+def count_values(values):
+    result = {}
+    for value in values:
+        result[value] = result.get(value, 0) + 1
+    return result
+
+
+"""
+returns {test: args of scoring_{test} tag} for tags of one solution
+* same match as tags.get_args_for_tag(f"scoring_{test}") (first tag which contains the name),
+  but tags are searched only once for all tests
+"""
+
+
+def get_scoring_args(tags, tests):
+    if any(re.escape(test) != test for test in tests):
+        # names with regex special chars are searched one by one
+        result = {}
+        for test in tests:
+            args = tags.get_args_for_tag(f"{SCORING_PREFIX}{test}")
+            if args is not None:
+                result[test] = args
+        return result
+
+    lengths = sorted({len(test) for test in tests})
+    tests = set(tests)
+    result = {}
+    for key, args in tags.data.items():
+        key = str(key)
+        pos = key.find(SCORING_PREFIX)
+        while pos >= 0:
+            rest = key[pos + len(SCORING_PREFIX) :]
+            for length in lengths:
+                if length > len(rest):
+                    break
+                name = rest[:length]
+                if name in tests and name not in result:
+                    result[name] = args
+            pos = key.find(SCORING_PREFIX, pos + 1)
+        if len(result) == len(tests):
+            break
+    return result
+
+
+def to_score(value, solution, tag_name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        logger.log(
+            f"score matrix | first param of tag '{tag_name}' is not a number ({solution.name})"
+        )
+        return None
+
+
+def build_score_matrix(env, tests):
+    proj = env.cwd.proj
+    names = sorted(proj.solutions)
+    matrix = ScoreMatrix(names, list(tests))
+    for row, name in enumerate(names):
+        solution = proj.solutions[name]
+
+        # scoring of tests
+        test_tags = solution.test_tags
+        if test_tags is not None and len(test_tags) > 0:
+            for test, args in get_scoring_args(test_tags, matrix.tests).items():
+                if args is not None and len(args) > 0:
+                    score = to_score(args[0], solution, f"{SCORING_PREFIX}{test}")
+                    if score is not None:
+                        matrix.set_test_score(row, test, score)
+
+        # total score
+        total_score = None
+        tags = solution.tags
+        if tags is not None and len(tags) > 0:
+            score_args = tags.get_args_for_tag("score")
+            if score_args is not None and len(score_args) > 0:
+                total_score = to_score(score_args[0], solution, "score")
+            else:
+                scoring = calculate_score(env, solution, tests)
+                if scoring is not None:
+                    total_score = int(scoring[0])
+        if total_score is not None:
+            matrix.total_scores[row] = total_score
+    return matrix
+
+
+score_matrices = {}  # {proj_path: (key, ScoreMatrix)}
+
+
+# returns score matrix of current project (built again only if something changed)
+def get_score_matrix(env, tests):
+    proj = env.cwd.proj
+    proj.preload_solutions()
+    key = (
+        tuple(sorted(tests)),
+        proj.max_score,
+        get_file_signature(get_sum_equation_file(env)),
+        tuple(
+            (name, solution.get_signature("tags"), solution.get_signature("test_tags"))
+            for name, solution in sorted(proj.solutions.items())
+        ),
+    )
+    cached = score_matrices.get(proj.path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    matrix = build_score_matrix(env, tests)
+    score_matrices[proj.path] = (key, matrix)
+    return matrix
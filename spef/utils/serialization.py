@@ -0,0 +1,22 @@
+import yaml
+
+
+"""
+yaml serialization of all spef files (config, project conf, tags, notes, reports)
+* libyaml (C) loader and dumper are used when available, they are much faster
+  than pure python ones (which are used as fallback)
+* only safe loader and dumper are used (files contain only plain data)
+"""
+
+
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+def load_yaml(stream):
+    return yaml.load(stream, Loader=YamlLoader)
+
+
+# kwargs are passed to yaml.dump (default_flow_style, allow_unicode, sort_keys...)
+def dump_yaml(data, stream=None, **kwargs):
+    return yaml.dump(data, stream, Dumper=YamlDumper, **kwargs)
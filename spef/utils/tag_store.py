@@ -0,0 +1,236 @@
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import traceback
+
+import spef.utils.logger as logger
+from spef.utils.index import get_file_signature
+from spef.utils.serialization import load_yaml, dump_yaml
+
+
+"""
+project-level tag store (optional, in proj conf: tag_store: sqlite)
+* tags of all solutions (solution_tags.yaml, tests_tags.yaml...) are in one sqlite db
+  in project root (TAG_STORE_FILE), key is path of yaml tags file relative to project
+* store is used by load_tags/save_tags_to_file, so Tags API stays the same
+* tags of proj tests dir stay in yaml files (they are read by tst.sh in container)
+* yaml files of solutions are still supported:
+  - yaml file changed since last sync (ex. results of testing from container) is imported
+  - yaml file removed since last sync (ex. cleaned tests results) removes its tags
+  - `spef tags import|export <proj_dir>` copies all tags from/to yaml files
+* every write gets new revision (for caches of loaded tags, see Solution)
+"""
+
+
+class TagStore:
+    def __init__(self, proj_path, solution_id):
+        self.proj_path = os.path.abspath(proj_path)
+        self.solution_id = solution_id
+        self.path = os.path.join(self.proj_path, logger.TAG_STORE_FILE)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS tags ("
+            "path TEXT PRIMARY KEY, data TEXT, mtime_ns INTEGER, size INTEGER, "
+            "rev INTEGER NOT NULL)"
+        )
+        self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def get_key(self, tags_file):
+        return os.path.relpath(os.path.abspath(tags_file), self.proj_path)
+
+    # store contains only tags files in solution dirs
+    def contains(self, tags_file):
+        if not tags_file.endswith(logger.TAGS_SUFFIX):
+            return False
+        key = self.get_key(tags_file)
+        parts = key.split(os.sep)
+        return (
+            len(parts) >= 2
+            and parts[0] != os.pardir
+            and bool(re.match(self.solution_id, parts[0]))
+        )
+
+    def get_row(self, key):
+        return self.conn.execute(
+            "SELECT data, mtime_ns, size, rev FROM tags WHERE path = ?", (key,)
+        ).fetchone()
+
+    def write(self, key, data, signature):
+        mtime_ns, size = signature if signature is not None else (None, None)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO tags (path, data, mtime_ns, size, rev) "
+            "VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(rev), 0) + 1 FROM tags))",
+            (key, json.dumps(data, default=str), mtime_ns, size),
+        )
+        self.conn.commit()
+
+    def import_file(self, key, tags_file, signature):
+        try:
+            with open(tags_file, "r") as f:
+                data = load_yaml(f)
+        except Exception as err:
+            logger.log(f"tag store | cannot import {tags_file} | {err}")
+            data = {}
+        self.write(key, data, signature)
+        return data
+
+    # returns data of tags for yaml tags file ({} if there are no tags)
+    def load(self, tags_file):
+        key = self.get_key(tags_file)
+        signature = get_file_signature(tags_file)
+        with self.lock:
+            row = self.get_row(key)
+            synced = (row[1], row[2]) if row and row[1] is not None else None
+            if signature is not None and (row is None or synced != signature):
+                # yaml file was changed outside of store
+                return self.import_file(key, tags_file, signature)
+            if row is None:
+                return {}
+            if signature is None and synced is not None:
+                # yaml file was removed
+                self.conn.execute("DELETE FROM tags WHERE path = ?", (key,))
+                self.conn.commit()
+                return {}
+            return json.loads(row[0])
+
+    def save(self, tags_file, data):
+        with self.lock:
+            # yaml file stays as it is (and it is not imported again until it changes)
+            self.write(self.get_key(tags_file), data, get_file_signature(tags_file))
+
+    def remove(self, tags_file):
+        with self.lock:
+            self.conn.execute(
+                "DELETE FROM tags WHERE path = ?", (self.get_key(tags_file),)
+            )
+            self.conn.commit()
+
+    def add(self, tags_file, tags_dir):
+        data = self.load(tags_file) or {}
+        data.update(tags_dir)
+        self.save(tags_file, data)
+
+    # returns signature of tags file for caches (yaml file signature, revision in store)
+    def get_signature(self, tags_file):
+        signature = get_file_signature(tags_file)
+        with self.lock:
+            row = self.get_row(self.get_key(tags_file))
+        return signature, row[3] if row else 0
+
+    def import_all(self):
+        count = 0
+        for root, dirs, files in os.walk(self.proj_path):
+            for file_name in files:
+                tags_file = os.path.join(root, file_name)
+                if self.contains(tags_file):
+                    with self.lock:
+                        self.import_file(
+                            self.get_key(tags_file),
+                            tags_file,
+                            get_file_signature(tags_file),
+                        )
+                    count += 1
+        return count
+
+    def export_all(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT path, data FROM tags").fetchall()
+        count = 0
+        for key, data in rows:
+            tags_file = os.path.join(self.proj_path, key)
+            if not os.path.isdir(os.path.dirname(tags_file)):
+                continue
+            with open(tags_file, "w+", encoding="utf8") as f:
+                dump_yaml(
+                    json.loads(data), f, default_flow_style=False, allow_unicode=True
+                )
+            with self.lock:
+                self.conn.execute(
+                    "UPDATE tags SET mtime_ns = ?, size = ? WHERE path = ?",
+                    (*get_file_signature(tags_file), key),
+                )
+                self.conn.commit()
+            count += 1
+        return count
+
+
+tag_stores = {}  # {proj_path: TagStore}
+tag_stores_lock = threading.Lock()
+
+
+# opens tag store of project (once), returns None if it cant be opened
+def open_tag_store(proj_path, solution_id):
+    key = os.path.abspath(proj_path)
+    with tag_stores_lock:
+        if key not in tag_stores:
+            try:
+                tag_stores[key] = TagStore(proj_path, solution_id)
+            except Exception as err:
+                logger.log(
+                    "open tag store | " + str(err) + " | " + traceback.format_exc()
+                )
+                return None
+        return tag_stores[key]
+
+
+# returns opened tag store which contains tags file (path) or None (tags are in yaml file)
+def get_tag_store(path):
+    if not tag_stores:
+        return None
+    with tag_stores_lock:
+        stores = list(tag_stores.values())
+    for store in stores:
+        if store.contains(path):
+            return store
+    return None
+
+
+def close_tag_stores():
+    with tag_stores_lock:
+        stores = list(tag_stores.values())
+        tag_stores.clear()
+    for store in stores:
+        store.close()
+
+
+""" spef tags import|export <proj_dir> """
+
+
+def tags_command(argv):
+    from spef.utils.loading import load_proj_from_conf_file
+
+    parser = argparse.ArgumentParser(
+        prog="spef tags",
+        description="copy tags of solutions between yaml files and project tag store",
+    )
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("proj_dir", help="project root directory")
+    args = parser.parse_args(argv)
+
+    proj_data = load_proj_from_conf_file(args.proj_dir)
+    if proj_data is None:
+        print(f"'{args.proj_dir}' is not project directory", file=sys.stderr)
+        return 2
+    store = open_tag_store(args.proj_dir, proj_data["solution_id"])
+    if store is None:
+        print(f"cannot open tag store in '{args.proj_dir}'", file=sys.stderr)
+        return 1
+    try:
+        if args.action == "import":
+            count = store.import_all()
+        else:
+            count = store.export_all()
+        print(f"{args.action}: {count} tags files")
+    finally:
+        close_tag_stores()
+    return 0
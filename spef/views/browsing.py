@@ -11,6 +11,9 @@ import spef.controls.functions as func
 from spef.modules.directory import Directory
 from spef.modules.bash import Bash_action
 from spef.testing.tst import clean_test, run_testsuite, calculate_score
+from spef.testing.parallel import run_testsuite_parallel
+from spef.testing.jobs import TestingJob, JOB_REFRESH_INTERVAL
+from spef.testing.fingerprint import get_changed_solutions, get_changed_tests
 from spef.testing.report import generate_report_from_template
 
 from spef.utils.loading import (
@@ -28,6 +31,7 @@ from spef.utils.reporting import (
     get_path_relative_to_project_dir,
     generate_scoring_stats,
     generate_test_results_hist,
+    generate_testing_metrics_stats,
 )
 import spef.utils.match as match
 import spef.utils.file as file
@@ -55,8 +59,11 @@ def get_directory_content(env):
             files.extend(file_names)
         else:
             for file_name in file_names:
-                if not file_name.endswith((logger.REPORT_SUFFIX, logger.TAGS_SUFFIX)):
-                    files.append(file_name)
+                if file_name.endswith((logger.REPORT_SUFFIX, logger.TAGS_SUFFIX)):
+                    continue
+                if file_name.startswith(logger.CACHE_FILES):
+                    continue
+                files.append(file_name)
         dirs.extend(dir_names)
         break
     dirs.sort()
@@ -108,7 +115,15 @@ def directory_browsing(stdscr, env):
         """ print all screens """
         rewrite_all_wins(env)
 
+        # while testing runs in background, dont wait for key forever (refresh progress)
+        if env.testing_job is not None:
+            stdscr.timeout(JOB_REFRESH_INTERVAL)
         key = stdscr.getch()
+        stdscr.timeout(-1)
+        if env.testing_job is not None:
+            env = check_testing_job(env)
+        if key == curses.ERR:
+            continue
 
         try:
             function = get_function_for_key(env, key)
@@ -293,6 +308,61 @@ def run_function(stdscr, env, fce, key):
     return env, False
 
 
+"""
+run testing of solutions
+* batches = [(solutions, kwargs for run_testsuite_parallel),...]
+* in background (if env.testing_background), progress is shown in hint line
+"""
+
+
+# testing and cleaning of tests results cant start while testing job runs in background
+def is_testing_running(env):
+    if env.testing_job is not None:
+        add_to_user_logs(
+            env, "warning", f"testing is already running (wait or cancel it)"
+        )
+        return True
+    return False
+
+
+def run_testing(env, batches):
+    total = sum(len(solutions) for solutions, _ in batches)
+    if env.testing_background and total > 0:
+        if is_testing_running(env):
+            return env
+        env.testing_job = TestingJob(env, batches)
+        env.testing_job.start()
+        add_to_user_logs(env, "info", f"testing of {total} solutions started...")
+        return env
+
+    for solutions, kwargs in batches:
+        run_testsuite_parallel(env, solutions, add_to_user_logs, **kwargs)
+        if env.is_exit_mode():
+            return env
+    add_to_user_logs(env, "info", f"testing all students done !!")
+    env.cwd = get_directory_content(env)
+    return env
+
+
+# print logs from testing job and finish it if its done
+def check_testing_job(env):
+    job = env.testing_job
+    if job is None:
+        return env
+    finished = job.is_finished()
+    job.flush_logs(env, add_to_user_logs)
+    if finished:
+        env.testing_job = None
+        if job.is_cancelled():
+            add_to_user_logs(
+                env, "warning", f"testing cancelled ({job.done}/{job.total} tested)"
+            )
+        else:
+            add_to_user_logs(env, "info", f"testing all students done !!")
+        env.cwd = get_directory_content(env)
+    return env
+
+
 def get_solutions_list(env):
     solution_list = []
     if env.filter_not_empty():
@@ -487,7 +557,7 @@ def run_menu_function(stdscr, env, fce, key, tests_dir=None):
                                     )
     # ======================= CLEAN =======================
     elif fce == func.TEST_CLEAN_ALL:
-        if env.cwd.proj is not None:
+        if env.cwd.proj is not None and not is_testing_running(env):
             solution_list = get_solutions_list(env)
             # for key, solution in env.cwd.proj.solutions.items():
             for solution in solution_list:
@@ -502,38 +572,36 @@ def run_menu_function(stdscr, env, fce, key, tests_dir=None):
     elif fce == func.TEST_CLEAN:  # on solution dir
         idx = win.cursor.row
         solution = try_get_solution_from_selected_item(env, idx)
-        if solution is not None:
+        if solution is not None and not is_testing_running(env):
             add_to_user_logs(
                 env, "info", f"cleaning tests results for student '{solution.name}'..."
             )
             clean_test(solution)
             env.cwd = get_directory_content(env)
     # ======================= RUN TESTSUITE =======================
-    elif fce == func.TEST_ALL_STUDENTS:  # ALL STUDENTS
+    elif fce in (func.TEST_ALL_STUDENTS, func.TEST_ALL_STUDENTS_FORCE):  # ALL STUDENTS
         if env.cwd.proj is not None:
             solution_list = get_solutions_list(env)
-            if solution_list:
-                # for key, solution in env.cwd.proj.solutions.items():
-                for solution in solution_list:
+            if fce == func.TEST_ALL_STUDENTS:
+                # skip solutions which didnt change since last successful testing
+                all_count = len(solution_list)
+                solution_list = get_changed_solutions(env.cwd.proj, solution_list)
+                skipped = all_count - len(solution_list)
+                if skipped:
                     add_to_user_logs(
-                        env, "info", f"*** testing student '{solution.name}' ***"
+                        env, "info", f"skipped {skipped} unchanged solutions"
                     )
-                    env, succ = run_testsuite(
-                        env, solution, add_to_user_logs, with_logs=False
-                    )
-                    if succ:
-                        add_to_user_logs(env, "info", f"testing done")
-                    else:
-                        add_to_user_logs(env, "warning", f"testing failed")
-                    if env.is_exit_mode():
-                        return env, True
-                add_to_user_logs(env, "info", f"testing all students done !!")
-                env.cwd = get_directory_content(env)
+            if solution_list:
+                # test solutions in parallel (each in its own docker container)
+                kwargs = {"jobs": env.testing_jobs, "with_logs": False}
+                env = run_testing(env, [(solution_list, kwargs)])
+                if env.is_exit_mode():
+                    return env, True
     elif fce == func.TEST_STUDENT:  # on solution dir
         """run testsuite on student solution directory"""
         idx = win.cursor.row
         solution = try_get_solution_from_selected_item(env, idx)
-        if solution is not None:
+        if solution is not None and not is_testing_running(env):
             add_to_user_logs(env, "info", f"*** testing student '{solution.name}' ***")
             env, succ = run_testsuite(env, solution, add_to_user_logs)
             if succ:
@@ -571,31 +639,61 @@ def run_menu_function(stdscr, env, fce, key, tests_dir=None):
                         test_name = test_names[option_idx]
                         tests.append(test_name)
                 # run selected tests
-                for solution in solution_list:
+                kwargs = {
+                    "jobs": env.testing_jobs,
+                    "with_logs": False,
+                    "run_seq_tests": True,
+                    "tests": tests,
+                }
+                env = run_testing(env, [(solution_list, kwargs)])
+                if env.is_exit_mode():
+                    return env, True
+    elif fce == func.ALL_RUN_MODIFIED_TESTS:  # all solutions
+        """run only tests modified since last testing (new results are merged to old ones)"""
+        if env.cwd.proj is not None:
+            solution_list = get_solutions_list(env)
+            test_names = match.get_tests_names(env)
+            changed = get_changed_tests(env.cwd.proj, solution_list, test_names)
+            skipped = len(solution_list) - len(changed)
+            if skipped:
+                add_to_user_logs(env, "info", f"{skipped} solutions are up to date")
+
+            # group solutions by tests to run (None = whole testsuite)
+            groups = {}
+            for solution in solution_list:
+                if solution.name in changed:
+                    tests = changed[solution.name]
+                    key = tuple(tests) if tests is not None else None
+                    groups.setdefault(key, []).append(solution)
+            batches = []
+            for tests, solutions in groups.items():
+                kwargs = {"jobs": env.testing_jobs, "with_logs": False}
+                if tests is not None:
                     add_to_user_logs(
-                        env, "info", f"*** testing student '{solution.name}' ***"
+                        env, "info", f"running modified tests: {', '.join(tests)}"
                     )
-                    env, succ = run_testsuite(
-                        env,
-                        solution,
-                        add_to_user_logs,
-                        with_logs=False,
-                        run_seq_tests=True,
-                        tests=tests,
+                    kwargs.update(
+                        {
+                            "run_seq_tests": True,
+                            "tests": list(tests),
+                            "merge_results": True,
+                        }
                     )
-                    if succ:
-                        add_to_user_logs(env, "info", f"testing done")
-                    else:
-                        add_to_user_logs(env, "warning", f"testing failed")
-                    if env.is_exit_mode():
-                        return env, True
-                add_to_user_logs(env, "info", f"testing all students done !!")
-                env.cwd = get_directory_content(env)
+                batches.append((solutions, kwargs))
+            env = run_testing(env, batches)
+            if env.is_exit_mode():
+                return env, True
+    elif fce == func.TESTING_CANCEL:
+        if env.testing_job is not None:
+            add_to_user_logs(env, "info", f"cancelling testing...")
+            env.testing_job.cancel()
+        else:
+            add_to_user_logs(env, "warning", f"no testing is running")
     elif fce == func.RUN_TESTS:  # on solution dir
         """select one or more tests and run this tests on student solution directory"""
         idx = win.cursor.row
         solution = try_get_solution_from_selected_item(env, idx)
-        if solution is not None:
+        if solution is not None and not is_testing_running(env):
             """show menu with tests for selection"""
             title = (
                 "Select one or more tests and press 'enter' to run them sequentially..."
@@ -644,8 +742,9 @@ def run_menu_function(stdscr, env, fce, key, tests_dir=None):
 
             # for key, solution in env.cwd.proj.solutions.items():
             add_to_user_logs(env, "info", f"recalculating score for students...")
+            tests = match.get_tests_names(env)
             for solution in solution_list:
-                total_score = calculate_score(env, solution)
+                total_score = calculate_score(env, solution, tests)
                 if total_score is not None:
                     score, bonus = total_score
                     solution.tags.set_tag("score", [score])
@@ -924,6 +1023,20 @@ def run_menu_function(stdscr, env, fce, key, tests_dir=None):
             add_to_user_logs(
                 env, "warning", f"cannot find file with statistics in '{stats_file}'"
             )
+    elif fce == func.SHOW_TESTING_METRICS:
+        generate_testing_metrics_stats(env)
+        stats_file = os.path.join(
+            env.cwd.proj.path, logger.REPORT_DIR, logger.TESTING_METRICS_STATS_FILE
+        )
+        if os.path.exists(stats_file):
+            env.set_file_to_open(stats_file)
+            env.reload_buff = True
+            env.set_view_mode()
+            return env, True
+        else:
+            add_to_user_logs(
+                env, "warning", f"cannot find file with statistics in '{stats_file}'"
+            )
     # =================== ADD TEST ===================
     elif fce == func.ADD_TEST:
         env.update_win_for_current_mode(win)
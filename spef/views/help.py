@@ -211,7 +211,7 @@ def get_description_for_fce(env, fce):
             func.QUICK_VIEW_ON_OFF: "set quick view mode on/off",
             func.OPEN_FILE: "open file for edit",
             func.GO_TO_TAGS: "change focus to tags",
-            func.SHOW_OR_HIDE_CACHED_FILES: "show/hide cached files (tags, report)",
+            func.SHOW_OR_HIDE_CACHED_FILES: "show/hide cached files (tags, report, indexes)",
             func.SHOW_OR_HIDE_LOGS: "show/hide logs for user",
             func.DELETE_FILE: "delete selected file",
             func.EXIT_PROGRAM: "exit program",
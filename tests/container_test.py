@@ -0,0 +1,41 @@
+"""Tests of containers of fake driver (Docker is not needed)."""
+
+import os
+import time
+
+from spef.testing.driver import OutputBuffer, get_driver, run_async
+from spef.testing.workspace import Workspace
+
+
+def is_running(pid):
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            # zombie is already killed (its parent didnt wait for it yet)
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_reset_kills_background_processes():
+    """Test that processes started by previous solution dont survive reset of container"""
+    driver = get_driver("fake")
+    workspace = Workspace()
+    os.makedirs(workspace.shared_dir, exist_ok=True)
+    cid = run_async(driver.create(workspace, [(workspace.shared_dir, "/opt", False)]))
+    try:
+        out = OutputBuffer()
+        script = "sleep 300 >/dev/null 2>&1 & echo $!"
+        code = run_async(driver.exec(cid, ["bash", "-c", script], stdout=out))
+        assert code == 0
+        pid = int(out.get_text())
+        assert is_running(pid)
+
+        assert run_async(driver.reset(cid))
+        for _ in range(50):
+            if not is_running(pid):
+                break
+            time.sleep(0.1)
+        assert not is_running(pid)
+    finally:
+        run_async(driver.remove([cid]))
+        workspace.clean()
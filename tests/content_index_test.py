@@ -0,0 +1,91 @@
+"""Tests of trigram index for filter by content (content_index: True in proj conf).
+
+Files found with index have to be the same as files found by scanning of all files.
+"""
+
+import os
+import time
+
+from grading_test import SOLUTIONS, create_example_project
+
+from spef.utils.content_index import INDEXED, UNREADABLE, ContentIndex
+from spef.utils.content_scan import CHUNK_SIZE, scan_files
+
+CONTENTS = ["tradelog", "SUM=", "scoring_", "a", "not in any file", "ěšč"]
+
+
+def get_files(proj_dir):
+    files = []
+    for root, dirs, names in os.walk(proj_dir):
+        files.extend(os.path.join(root, name) for name in names)
+    return sorted(files)
+
+
+def set_old_mtime(files):
+    # recently modified files are not indexed (their changes could be missed)
+    old = time.time() - 3600
+    for file_path in files:
+        os.utime(file_path, (old, old))
+
+
+def find(files, content, candidates=None):
+    matches, _ = scan_files(files if candidates is None else candidates, content)
+    return sorted(matches)
+
+
+def test_content_index(tmp_path):
+    """Test candidates from index for new, changed and removed files"""
+    proj_dir = create_example_project(tmp_path)
+    files = get_files(proj_dir)
+    set_old_mtime(files)
+
+    index = ContentIndex(str(proj_dir))
+    try:
+        # filter doesnt wait for indexing (files which are not indexed yet are scanned)
+        assert index.get_candidates(files, "tradelog") == files
+
+        # binary files (gzipped logs of tests) never match
+        states = index.update(files)
+        assert sorted(states) == files
+        for file_path, (_, state) in states.items():
+            assert state == (UNREADABLE if file_path.endswith(".gz") else INDEXED)
+        for content in CONTENTS:
+            candidates = index.get_candidates(files, content)
+            assert find(files, content, candidates) == find(files, content)
+
+        # changed file
+        changed = proj_dir / SOLUTIONS[0] / "tradelog"
+        with open(changed, "a") as f:
+            f.write("# unique text in file\n")
+        set_old_mtime([changed])
+        candidates = index.get_candidates(files, "unique text")
+        assert candidates == [str(changed)]
+        assert find(files, "unique text", candidates) == [str(changed)]
+
+        # removed file
+        os.remove(changed)
+        files.remove(str(changed))
+        assert index.get_candidates(files, "unique text") == []
+        index.update(files)
+        rows = index.conn.execute("SELECT path FROM files").fetchall()
+        assert os.path.relpath(changed, proj_dir) not in {row[0] for row in rows}
+    finally:
+        index.close()
+
+
+def test_invalid_bytes(tmp_path):
+    """Test that file with invalid byte after first chunk is found with and without index"""
+    file_path = tmp_path / "notes"
+    file_path.write_bytes(b"first\n" + b"x" * CHUNK_SIZE + b"\xff\nlast\n")
+    set_old_mtime([file_path])
+    files = [str(file_path)]
+
+    index = ContentIndex(str(tmp_path))
+    try:
+        assert index.update(files)[str(file_path)][1] == INDEXED
+        for content in ["first", "last", "not in file"]:
+            candidates = index.get_candidates(files, content)
+            assert find(files, content, candidates) == find(files, content)
+        assert find(files, "last") == files
+    finally:
+        index.close()
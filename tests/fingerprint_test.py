@@ -0,0 +1,196 @@
+"""Tests of incremental testing (fingerprints of solutions and tests) and project stores.
+
+Functions are called directly on example project, testing runs with fake driver.
+"""
+
+import os
+import subprocess
+
+import yaml
+
+from grading_test import SOLUTIONS, create_example_project
+
+from spef.modules.project import Project
+from spef.testing.tst import clean_test
+from spef.testing.fingerprint import (
+    get_changed_solutions,
+    get_changed_tests,
+    get_fingerprint,
+    get_fingerprint_file,
+    get_tests_fingerprint,
+    load_fingerprint,
+    merge_test_tags,
+    save_fingerprint,
+)
+from spef.utils.loading import load_proj_from_conf_file
+from spef.utils.tag_store import close_tag_stores
+
+
+def load_project(proj_dir, **conf):
+    if conf:
+        conf_file = proj_dir / "proj_conf.yaml"
+        data = yaml.safe_load(conf_file.read_text())
+        data.update(conf)
+        conf_file.write_text(yaml.safe_dump(data))
+    proj = Project(str(proj_dir))
+    assert proj.set_values_from_conf(load_proj_from_conf_file(str(proj_dir)))
+    return proj
+
+
+def grade(proj_dir, *args):
+    output = subprocess.run(
+        ["spef", "grade", str(proj_dir), "--driver", "fake", *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    assert output.returncode == 0, output.stderr.decode()
+
+
+def test_fingerprint_in_tag_store(tmp_path):
+    """Test fingerprint of solution saved to project tag store
+
+    Fingerprint is only in store (not in yaml file) and solution is not changed after it is saved.
+    """
+    proj = load_project(create_example_project(tmp_path), tag_store="sqlite")
+    try:
+        solutions = [proj.solutions[name] for name in SOLUTIONS]
+        assert get_changed_solutions(proj, solutions) == solutions
+
+        tests_fingerprint = get_tests_fingerprint(proj.path)
+        solution = solutions[0]
+        fingerprint = get_fingerprint(solution, tests_fingerprint)
+        save_fingerprint(solution, fingerprint=fingerprint)
+
+        assert not os.path.exists(get_fingerprint_file(solution))
+        assert load_fingerprint(solution) == fingerprint
+        assert get_changed_solutions(proj, solutions) == solutions[1:]
+    finally:
+        close_tag_stores()
+
+
+def test_changed_solutions(tmp_path):
+    """Test solutions which need testing again after grading
+
+    Solution is changed when its files change, all solutions are changed when tests change.
+    """
+    proj_dir = create_example_project(tmp_path)
+    grade(proj_dir)
+    proj = load_project(proj_dir)
+    solutions = [proj.solutions[name] for name in SOLUTIONS]
+    assert get_changed_solutions(proj, solutions) == []
+
+    with open(proj_dir / SOLUTIONS[0] / "tradelog", "a") as f:
+        f.write("# changed\n")
+    assert get_changed_solutions(proj, solutions) == solutions[:1]
+
+    with open(proj_dir / "tests" / "cat1" / "dotest.sh", "a") as f:
+        f.write("# changed\n")
+    assert get_changed_solutions(proj, solutions) == solutions
+
+
+def test_changed_tests(tmp_path):
+    """Test rerun of modified test (new version in test_tags.yaml)
+
+    Only modified test is run again and its results are merged to results of other tests.
+    """
+    proj_dir = create_example_project(tmp_path)
+    grade(proj_dir)
+    proj = load_project(proj_dir)
+    solutions = [proj.solutions[name] for name in SOLUTIONS]
+    test_names = proj.get_tests_names()
+    assert get_changed_tests(proj, solutions, test_names) == {}
+
+    (proj_dir / "tests" / "cat1" / "test_tags.yaml").write_text("version:\n- 2\n")
+    assert get_changed_tests(proj, solutions, test_names) == {
+        name: ["cat1"] for name in SOLUTIONS
+    }
+
+    tests_tags = proj_dir / SOLUTIONS[0] / "tests" / "tests_tags.yaml"
+    old_tags = yaml.safe_load(tests_tags.read_text())
+    grade(proj_dir, "--tests", "cat1")
+    assert get_changed_tests(proj, solutions, test_names) == {}
+    tags = yaml.safe_load(tests_tags.read_text())
+    for test in test_names:
+        assert f"scoring_{test}" in tags
+        if test != "cat1":
+            assert tags[f"scoring_{test}"] == old_tags[f"scoring_{test}"]
+
+
+def test_merge_test_tags():
+    """Test that tags of rerun tests are replaced and tags of other tests are kept"""
+    old_data = {
+        "scoring_cat1": [0],
+        "cat1_fail": ["diff"],
+        "scoring_cat10": [1],
+        "cat10_ok": [],
+        "last_testing": ["01/01/22-10:00"],
+    }
+    new_data = {"scoring_cat1": [1], "cat1_ok": []}
+    assert merge_test_tags(old_data, new_data, ["cat1"]) == {
+        "scoring_cat10": [1],
+        "cat10_ok": [],
+        "last_testing": ["01/01/22-10:00"],
+        "scoring_cat1": [1],
+        "cat1_ok": [],
+    }
+    assert merge_test_tags(None, new_data, ["cat1"]) == new_data
+
+
+def test_grade_with_tag_store(tmp_path):
+    """Test grading of project with tag store (tag_store: sqlite)
+
+    Tags of solutions are saved to store, fingerprints are found there and export writes yaml files.
+    """
+    proj_dir = create_example_project(tmp_path)
+    load_project(proj_dir, tag_store="sqlite")
+    close_tag_stores()
+    grade(proj_dir)
+    assert (proj_dir / "tags.db").is_file()
+
+    proj = load_project(proj_dir)
+    try:
+        solutions = [proj.solutions[name] for name in SOLUTIONS]
+        for solution in solutions:
+            assert solution.tags.get_args_for_tag("score") is not None
+            assert not os.path.exists(get_fingerprint_file(solution))
+        assert get_changed_solutions(proj, solutions) == []
+    finally:
+        close_tag_stores()
+
+    output = subprocess.run(
+        ["spef", "tags", "export", str(proj_dir)], stdout=subprocess.PIPE
+    )
+    assert output.returncode == 0
+    for solution in SOLUTIONS:
+        tags = yaml.safe_load((proj_dir / solution / "solution_tags.yaml").read_text())
+        assert "score" in tags
+
+
+def test_clean_with_tag_store(tmp_path):
+    """Test that cleaned solution is tested again (fingerprint in tag store is removed)
+
+    Cleaned results of some tests mark only these tests for rerun.
+    """
+    proj_dir = create_example_project(tmp_path)
+    load_project(proj_dir, tag_store="sqlite")
+    close_tag_stores()
+    grade(proj_dir)
+
+    proj = load_project(proj_dir)
+    try:
+        solutions = [proj.solutions[name] for name in SOLUTIONS]
+        test_names = proj.get_tests_names()
+        assert get_changed_solutions(proj, solutions) == []
+
+        clean_test(solutions[0])
+        assert get_changed_solutions(proj, solutions) == solutions[:1]
+        assert get_changed_tests(proj, solutions, test_names) == {SOLUTIONS[0]: None}
+
+        clean_test(solutions[1], tests=["cat1"])
+        assert get_changed_solutions(proj, solutions) == solutions
+        assert get_changed_tests(proj, solutions, test_names) == {
+            SOLUTIONS[0]: None,
+            SOLUTIONS[1]: ["cat1"],
+        }
+    finally:
+        close_tag_stores()
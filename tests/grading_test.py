@@ -0,0 +1,81 @@
+"""Tests of headless grading (`spef grade`) with fake container driver.
+
+Fake driver runs the whole testing pipeline (staging, testsuite, results,
+score and reports) directly on host, so Docker is not needed.
+"""
+
+import os
+import pathlib
+import shutil
+import subprocess
+import zipfile
+import yaml
+
+EXAMPLE_DIR = pathlib.Path(__file__).parent.parent / "example"
+SOLUTIONS = ["xakfjq00", "xaserw00"]
+
+
+def create_example_project(path):
+    proj = path / "example"
+    shutil.copytree(
+        EXAMPLE_DIR, proj, ignore=shutil.ignore_patterns("*.zip", "Dockerfile")
+    )
+    for solution in SOLUTIONS:
+        with zipfile.ZipFile(EXAMPLE_DIR / f"{solution}.zip") as archive:
+            archive.extractall(proj / solution)
+    return proj
+
+
+def test_grade_with_fake_driver(tmp_path):
+    """Test grading of all solutions without Docker
+
+    Checks that every solution has results of all tests, score and total report.
+    """
+    proj = create_example_project(tmp_path)
+    tests = [d.name for d in (proj / "tests").iterdir() if (d / "dotest.sh").is_file()]
+
+    output = subprocess.run(
+        ["spef", "grade", str(proj), "--jobs", "2", "--driver", "fake"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    assert output.returncode == 0, output.stderr.decode()
+
+    lines = output.stdout.decode().splitlines()
+    assert [line.split()[0] for line in lines] == SOLUTIONS
+    for solution in SOLUTIONS:
+        tests_tags = proj / solution / "tests" / "tests_tags.yaml"
+        tags = yaml.safe_load(tests_tags.read_text())
+        for test in tests:
+            assert f"scoring_{test}" in tags
+        solution_tags = yaml.safe_load(
+            (proj / solution / "solution_tags.yaml").read_text()
+        )
+        assert "score" in solution_tags
+        assert (proj / solution / "reports" / "total_report").is_file()
+
+
+def test_grade_keeps_solution_files(tmp_path):
+    """Test that testing doesnt change files of submitted solution
+
+    Test modifies staged solution in container (chmod and write), original files stay the same.
+    """
+    proj = create_example_project(tmp_path)
+    test_dir = proj / "tests" / "modify"
+    test_dir.mkdir()
+    (test_dir / "dotest.sh").write_text(
+        "chmod 777 ../../tradelog\necho modified >>../../tradelog\n"
+    )
+    sut = proj / SOLUTIONS[0] / "tradelog"
+    sut.chmod(0o755)
+    content, mode = sut.read_bytes(), sut.stat().st_mode
+
+    output = subprocess.run(
+        ["spef", "grade", str(proj), "--tests", "modify", "--driver", "fake"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    assert output.returncode == 0, output.stderr.decode()
+
+    assert sut.read_bytes() == content
+    assert sut.stat().st_mode == mode
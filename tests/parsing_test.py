@@ -0,0 +1,54 @@
+"""Tests of sum equation (proj/tests/sum) used for total score of solution."""
+
+import types
+
+import pytest
+
+from spef.modules.tags import Tags
+from spef.utils.parsing import (
+    calculate_equation,
+    compile_sum_equation,
+    evaluate_sum_equation,
+)
+
+
+def test_compile_sum_equation():
+    """Test compilation of SUM line to terms (default 'scoring_' prefix of tags)"""
+    assert compile_sum_equation("SUM=SUM_ALL_TESTS + bonus*scoring_x - cat1\n") == [
+        (None, "SUM_ALL_TESTS"),
+        ("+", "scoring_bonus"),
+        ("*", "scoring_x"),
+        ("-", "scoring_cat1"),
+    ]
+    assert compile_sum_equation("cat1+cat2") == []
+    assert compile_sum_equation("SUM=cat1 +* cat2") == []
+    assert compile_sum_equation(None) == []
+
+
+def test_calculate_equation():
+    """Test calculation of tokens (* before + and -, unary + and -)"""
+    assert calculate_equation([2, "+", 3, "*", 4]) == 14
+    assert calculate_equation([2, "*", 3, "-", 4, "*", 5]) == -14
+    assert calculate_equation(["-", 2, "*", 3, "+", 10]) == 4
+    assert calculate_equation([5]) == 5
+    for tokens in ([], [2, "+"], [2, 3], [2, "/", 3]):
+        with pytest.raises(ValueError):
+            calculate_equation(tokens)
+
+
+def test_evaluate_sum_equation():
+    """Test values of terms for solution (terms without value are skipped with their operand)"""
+    solution = types.SimpleNamespace(
+        tags=Tags("solution_tags.yaml", {"scoring_bonus": [2]}),
+        test_tags=Tags(
+            "tests_tags.yaml",
+            {"scoring_cat1": [1], "scoring_cat2": ["3"], "scoring_cat3": ["x"]},
+        ),
+    )
+    equation = compile_sum_equation("SUM=missing + SUM_ALL_TESTS * bonus - cat1")
+    tokens, ignored = evaluate_sum_equation(
+        equation, solution, ["cat1", "cat2", "cat3"]
+    )
+    assert tokens == [4, "*", 2, "-", 1]
+    assert calculate_equation(tokens) == 7
+    assert ignored == ["scoring_missing", "scoring_cat3"]